@@ -0,0 +1,512 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import aiohttp
+import numpy as np
+
+API_BASE_URL = "https://api.twitterapi.io/twitter"
+
+# 🔑 Reemplaza con tu API key real
+API_KEY = "API_KEY_AQUI"
+
+# Pausa entre páginas de un mismo flujo para evitar rate limiting
+PAGE_DELAY = 1
+
+# Espera cuando la API responde 429
+RATE_LIMIT_DELAY = 60
+
+class SeenIds:
+    """
+    Conjunto compacto de IDs de tweet ya vistos, compartido entre consultas.
+
+    Los IDs se guardan como un arreglo int64 ordenado (8 bytes por ID) y la pertenencia
+    se resuelve con búsqueda binaria. Los IDs nuevos se acumulan en un buffer pequeño
+    que se fusiona con el arreglo principal cada cierto número de inserciones.
+    """
+
+    def __init__(self, merge_every=4096):
+        self.merge_every = merge_every
+        self._sorted = np.array([], dtype=np.int64)
+        self._pending = np.array([], dtype=np.int64)
+
+    def __len__(self):
+        return len(self._sorted) + len(self._pending)
+
+    def new_mask(self, ids):
+        """
+        Indica qué IDs no se han visto todavía, sin marcarlos.
+
+        Args:
+            ids (list): IDs de tweet (texto o enteros)
+
+        Returns:
+            np.ndarray: Máscara booleana con True para los IDs nuevos. Un ID repetido
+                        dentro de la misma lista solo cuenta como nuevo la primera vez.
+        """
+        ids = np.asarray([int(i) for i in ids], dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self._sorted, ids), max(len(self._sorted) - 1, 0))
+        seen = self._sorted[pos] == ids if len(self._sorted) else np.zeros(len(ids), dtype=bool)
+        seen |= np.isin(ids, self._pending)
+
+        first = np.zeros(len(ids), dtype=bool)
+        first[np.unique(ids, return_index=True)[1]] = True
+
+        return ~seen & first
+
+    def add(self, ids):
+        """Marca IDs como vistos."""
+        ids = np.asarray([int(i) for i in ids], dtype=np.int64)
+        self._pending = np.concatenate([self._pending, ids])
+        if len(self._pending) >= self.merge_every:
+            self._sorted = np.union1d(self._sorted, self._pending)
+            self._pending = np.array([], dtype=np.int64)
+
+class AsyncFetchEngine:
+    """
+    Motor asíncrono para las tres consultas paginadas de la API (búsqueda, respuestas y retweeters).
+
+    Usa una sola sesión HTTP y un semáforo compartido, de modo que cientos de flujos
+    paginados pueden estar en curso desde un mismo proceso sin abrir hilos.
+
+    Todas las operaciones aceptan output_path para guardar el JSON en una ruta fija
+    en lugar del nombre con fecha y hora dentro de raw_data.
+
+    Uso:
+        async with AsyncFetchEngine(max_concurrency=50) as engine:
+            resultados = await asyncio.gather(*[engine.tweet_responses(t) for t in tweet_ids])
+    """
+
+    def __init__(self, max_concurrency=50, api_key=API_KEY, timeout=30):
+        self.max_concurrency = max_concurrency
+        self.api_key = api_key
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            headers={"X-API-Key": self.api_key},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+
+    async def _fetch_page(self, url, params, label, page):
+        """
+        Descarga una página y centraliza el manejo de códigos de estado.
+
+        Returns:
+            dict: JSON de la respuesta, o None si hubo un error que termina la paginación
+        """
+        while True:
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params) as response:
+                        status = response.status
+                        print(f"{label} 📊 Status Code: {status}")
+
+                        if status == 200:
+                            return await response.json(content_type=None)
+                        if status == 401:
+                            print(f"{label} 🔐 Error 401: API Key inválida")
+                            return None
+                        if status == 403:
+                            print(f"{label} 🚫 Error 403: Acceso prohibido")
+                            return None
+                        if status != 429:
+                            print(f"{label} ❌ Error {status}")
+                            print(f"{label} Respuesta: {await response.text()}")
+                            return None
+            except Exception as e:
+                print(f"{label} 💥 Error en página {page}: {e}")
+                return None
+
+            # 429: se espera fuera del semáforo para no bloquear a los demás flujos
+            print(f"{label} ⏰ Error 429: Límite de rate excedido - esperando {RATE_LIMIT_DELAY} segundos...")
+            await asyncio.sleep(RATE_LIMIT_DELAY)
+
+    async def _paginate(self, endpoint, base_params, items_key, is_valid, label, limit=None,
+                        continue_in=None, stop_on_repeated_cursor=True, on_page=None):
+        """
+        Recorre todas las páginas de un endpoint.
+
+        Args:
+            endpoint (str): Ruta del endpoint relativa a API_BASE_URL
+            base_params (dict): Parámetros de la consulta (sin cursor)
+            items_key (str): Campo de la respuesta que contiene los elementos ('tweets' o 'users')
+            is_valid (callable): Recibe el JSON de la respuesta y dice si tiene formato válido
+            label (str): Prefijo para los mensajes de este flujo
+            limit (int, optional): Máximo de elementos a obtener
+            continue_in (str, optional): Cursor desde donde continuar
+            stop_on_repeated_cursor (bool): Terminar si la API devuelve el mismo cursor
+            on_page (callable, optional): Recibe los elementos de cada página y devuelve
+                                          (elementos a conservar, seguir paginando)
+
+        Returns:
+            tuple: (elementos, páginas procesadas, último cursor, completo). completo es False
+                   si la paginación se cortó por un error y no por haber llegado al final.
+        """
+        url = f"{API_BASE_URL}/{endpoint}"
+        items = []
+        cursor = continue_in if continue_in else ""
+        page = 1
+        complete = False
+
+        while True:
+            print(f"{label} 📄 Procesando página {page}...")
+
+            params = base_params.copy()
+            if cursor:  # Solo agregar cursor si no está vacío
+                params["cursor"] = cursor
+
+            data = await self._fetch_page(url, params, label, page)
+            if data is None:
+                print(f"{label} ⚠️  Descarga incompleta: se detuvo en la página {page}")
+                break
+
+            if not is_valid(data):
+                print(f"{label} ❌ Error en respuesta: {data.get('message', 'Formato de respuesta no reconocido')}")
+                print(f"{label} 💡 Respuesta completa para debug: {json.dumps(data, indent=2)[:500]}...")
+                print(f"{label} ⚠️  Descarga incompleta: se detuvo en la página {page}")
+                break
+
+            page_items = data.get(items_key, [])
+            has_next_page = data.get('has_next_page', False)
+            next_cursor = data.get('next_cursor', '')
+
+            print(f"{label} ✅ Página {page}: {len(page_items)} elementos obtenidos")
+
+            keep_going = True
+            if on_page:
+                page_items, keep_going = on_page(page_items)
+            items.extend(page_items)
+
+            # Desde aquí, terminar es intencional: la descarga queda completa
+            complete = True
+
+            if limit and len(items) >= limit:
+                items = items[:limit]
+                print(f"{label} 🎯 Límite de {limit} elementos alcanzado")
+                break
+
+            if not keep_going:
+                break
+
+            if has_next_page and next_cursor and not (stop_on_repeated_cursor and next_cursor == cursor):
+                complete = False
+                cursor = next_cursor
+                page += 1
+                print(f"{label} ➡️  Hay más páginas. Cursor siguiente: {next_cursor[:20]}...")
+                await asyncio.sleep(PAGE_DELAY)
+            else:
+                if stop_on_repeated_cursor and next_cursor and next_cursor == cursor:
+                    print(f"{label} 🔄 Cursor no cambió - terminando para evitar bucle infinito")
+                else:
+                    print(f"{label} 🏁 No hay más páginas disponibles")
+                break
+
+        return items, page, cursor, complete
+
+    async def search_tweets(self, search_query, limit_tweets=None, output_path=None):
+        """
+        Obtiene los tweets de una búsqueda avanzada (equivalente asíncrono de get_tweets_by_search).
+
+        Returns:
+            dict: Resultado guardado en raw_data, o None si no se obtuvieron tweets
+        """
+        label = f"[busqueda '{search_query[:30]}']"
+        tweets, pages, cursor, complete = await self._paginate(
+            "tweet/advanced_search",
+            {"query": search_query, "queryType": "Latest"},
+            'tweets',
+            lambda data: 'tweets' in data or data.get('status') == 'success',
+            label,
+            limit=limit_tweets,
+            stop_on_repeated_cursor=False
+        )
+
+        if not tweets:
+            print(f"{label} ❌ No se obtuvieron tweets")
+            return None
+
+        result = {
+            "tweets": tweets,
+            "total_tweets": len(tweets),
+            "total_paginas": pages,
+            "fecha_obtencion": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "consulta": search_query,
+            "ultimo_cursor": cursor,  # Guardar el último cursor para poder continuar
+            "completo": complete
+        }
+        await _save_result(result, "twitter_search_request", label, output_path)
+        return result
+
+    async def search_many(self, search_queries, limit_per_query=None, seen_threshold=0.8, patience=2,
+                          output_path=None):
+        """
+        Ejecuta varias búsquedas en paralelo eliminando tweets repetidos entre consultas.
+
+        Los IDs se deduplican a medida que llegan las páginas usando un SeenIds compartido.
+        Una consulta se detiene antes de tiempo cuando `patience` páginas seguidas tienen
+        al menos `seen_threshold` de tweets ya vistos, lo que ahorra llamadas a la API.
+
+        Args:
+            search_queries (list): Consultas de búsqueda avanzada
+            limit_per_query (int, optional): Máximo de tweets nuevos por consulta
+            seen_threshold (float): Fracción de repetidos a partir de la cual una página cuenta como repetida
+            patience (int): Páginas repetidas seguidas antes de detener la consulta
+
+        Returns:
+            dict: Resultado combinado guardado en raw_data, o None si no se obtuvieron tweets
+        """
+        seen = SeenIds()
+
+        async def run_query(search_query):
+            label = f"[busqueda '{search_query[:30]}']"
+            stats = {"consulta": search_query, "tweets_nuevos": 0, "tweets_repetidos": 0,
+                     "paginas_repetidas_seguidas": 0, "detenida_por_repetidos": False}
+
+            def on_page(page_tweets):
+                if not page_tweets:
+                    return page_tweets, True
+
+                is_new = seen.new_mask([t.get('id') for t in page_tweets])
+                new_tweets = [t for t, nuevo in zip(page_tweets, is_new) if nuevo]
+                if limit_per_query:
+                    # Lo que no se va a guardar no se marca como visto para que otra consulta lo pueda tomar
+                    new_tweets = new_tweets[:limit_per_query - stats["tweets_nuevos"]]
+                seen.add([t.get('id') for t in new_tweets])
+                for tweet in new_tweets:
+                    tweet['consulta'] = search_query
+
+                # Los nuevos que se descartan por el límite no cuentan como repetidos
+                repeated = len(page_tweets) - int(is_new.sum())
+                stats["tweets_nuevos"] += len(new_tweets)
+                stats["tweets_repetidos"] += repeated
+
+                if repeated / len(page_tweets) >= seen_threshold:
+                    stats["paginas_repetidas_seguidas"] += 1
+                else:
+                    stats["paginas_repetidas_seguidas"] = 0
+
+                if stats["paginas_repetidas_seguidas"] >= patience:
+                    stats["detenida_por_repetidos"] = True
+                    print(f"{label} ♻️  {patience} páginas seguidas con tweets ya vistos - deteniendo consulta")
+                    return new_tweets, False
+
+                return new_tweets, True
+
+            tweets, pages, cursor, complete = await self._paginate(
+                "tweet/advanced_search",
+                {"query": search_query, "queryType": "Latest"},
+                'tweets',
+                lambda data: 'tweets' in data or data.get('status') == 'success',
+                label,
+                limit=limit_per_query,
+                stop_on_repeated_cursor=False,
+                on_page=on_page
+            )
+
+            del stats["paginas_repetidas_seguidas"]
+            stats.update({"total_paginas": pages, "ultimo_cursor": cursor, "completa": complete})
+            return tweets, stats
+
+        outcomes = await asyncio.gather(*[run_query(q) for q in search_queries])
+        tweets = [t for query_tweets, _ in outcomes for t in query_tweets]
+        label = f"[busqueda x{len(search_queries)}]"
+
+        if not tweets:
+            print(f"{label} ❌ No se obtuvieron tweets")
+            return None
+
+        result = {
+            "tweets": tweets,
+            "total_tweets": len(tweets),
+            "total_paginas": sum(stats["total_paginas"] for _, stats in outcomes),
+            "fecha_obtencion": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "consultas": [stats for _, stats in outcomes],
+            "completo": all(stats["completa"] for _, stats in outcomes)
+        }
+        await _save_result(result, "twitter_search_multi", label, output_path)
+        return result
+
+    async def tweet_responses(self, tweet_id, limit_responses=None, since_time=None, until_time=None, continue_in=None,
+                              output_path=None):
+        """
+        Obtiene las respuestas de un tweet (equivalente asíncrono de get_tweet_responses).
+
+        Returns:
+            dict: Resultado guardado en raw_data, o None si no se obtuvieron respuestas
+        """
+        label = f"[respuestas {tweet_id}]"
+        base_params = {"tweetId": tweet_id}
+        if since_time:
+            base_params["sinceTime"] = since_time
+        if until_time:
+            base_params["untilTime"] = until_time
+
+        # Para replies, la API devuelve los tweets en el campo 'tweets' (no 'replies')
+        replies, pages, cursor, complete = await self._paginate(
+            "tweet/replies",
+            base_params,
+            'tweets',
+            lambda data: data.get('status') == 'success',
+            label,
+            limit=limit_responses,
+            continue_in=continue_in
+        )
+
+        if not replies:
+            print(f"{label} ❌ No se obtuvieron respuestas")
+            return None
+
+        result = {
+            "tweet_id": tweet_id,
+            "replies": replies,
+            "total_replies": len(replies),
+            "total_paginas": pages,
+            "fecha_obtencion": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ultimo_cursor": cursor,
+            "parametros": {
+                "since_time": since_time,
+                "until_time": until_time,
+                "limit_responses": limit_responses,
+                "continue_in": continue_in
+            },
+            "completo": complete
+        }
+        await _save_result(result, f"twitter_replies_{tweet_id}", label, output_path)
+        return result
+
+    async def tweet_retweets(self, tweet_id, limit_responses=None, continue_in=None, profile_cache=None,
+                             output_path=None):
+        """
+        Obtiene los retweeters de un tweet (equivalente asíncrono de get_tweet_retweets).
+
+        Si se pasa un ProfileCache, los perfiles se guardan en la caché y el JSON solo
+        contiene los IDs ('retweeter_ids') y la ruta de la caché ('cache_perfiles').
+
+        Returns:
+            dict: Resultado guardado en raw_data, o None si no se obtuvieron retweeters
+        """
+        label = f"[retweeters {tweet_id}]"
+
+        # Para retweeters, la API puede no incluir 'status', pero si tiene 'users' es exitosa
+        retweeters, pages, cursor, complete = await self._paginate(
+            "tweet/retweeters",
+            {"tweetId": tweet_id},
+            'users',
+            lambda data: data.get('status') == 'success' or 'users' in data,
+            label,
+            limit=limit_responses,
+            continue_in=continue_in
+        )
+
+        if not retweeters:
+            print(f"{label} ❌ No se obtuvieron retweeters")
+            return None
+
+        result = {
+            "tweet_id": tweet_id,
+            "retweeters": retweeters,
+            "total_retweeters": len(retweeters),
+            "total_paginas": pages,
+            "fecha_obtencion": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ultimo_cursor": cursor,
+            "parametros": {
+                "limit_responses": limit_responses,
+                "continue_in": continue_in
+            },
+            "completo": complete
+        }
+
+        if profile_cache is not None:
+            # La ruta se fija antes para registrar en la caché qué JSON referencia los perfiles
+            output_path = _result_path(f"twitter_retweeters_{tweet_id}", output_path)
+            reference = _result_path(f"twitter_retweeters_{tweet_id}", output_path, complete)
+            stored = await asyncio.to_thread(profile_cache.put_many, retweeters, reference=reference)
+            print(f"{label} 👤 Perfiles en caché: {stored} nuevos o actualizados, "
+                  f"{len(retweeters) - stored} ya estaban frescos")
+            result["retweeter_ids"] = [str(r.get('id')) for r in result.pop("retweeters")]
+            result["cache_perfiles"] = profile_cache.db_path
+
+        await _save_result(result, f"twitter_retweeters_{tweet_id}", label, output_path)
+        return result
+
+def _result_path(prefix, path=None, complete=True):
+    """
+    Ruta donde se guarda un resultado: la indicada o una en raw_data con fecha y hora.
+
+    Un resultado incompleto (paginación cortada por un error) va a {ruta}.parcial.json,
+    así nunca ocupa la ruta de una descarga completa.
+    """
+
+    if path is None:
+        current_time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = f'raw_data/{prefix}_{current_time_str}.json'
+    if not complete:
+        path = f'{os.path.splitext(path)[0]}.parcial.json'
+    return path
+
+async def _save_result(result, prefix, label, path=None):
+    """Guarda un resultado (por defecto en raw_data con fecha y hora) sin bloquear el event loop."""
+
+    complete = result.get("completo", True)
+    partial_path = _result_path(prefix, path, complete=False) if path is not None else None
+    path = _result_path(prefix, path, complete)
+
+    def write():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    await asyncio.to_thread(write)
+
+    # Una descarga completa reemplaza al parcial que hubiera dejado un intento anterior
+    if complete and partial_path is not None and os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    items_key = next(k for k in ('tweets', 'replies', 'retweeters', 'retweeter_ids') if k in result)
+    print(f"{label} 📊 RESUMEN FINAL: {len(result[items_key])} elementos obtenidos")
+    print(f"{label} 💾 Datos guardados en '{path}'")
+    if not complete:
+        print(f"{label} ⚠️  Resultado incompleto: se guardó aparte para no confundirlo con una descarga completa")
+    return path
+
+def run_engine(operation, max_concurrency=50):
+    """
+    Ejecuta una o varias operaciones del motor en un event loop nuevo.
+
+    Si ya hay un event loop corriendo en este hilo (por ejemplo, en Jupyter), el loop
+    nuevo se ejecuta en un hilo aparte y se espera su resultado.
+
+    Args:
+        operation (callable): Recibe el AsyncFetchEngine abierto y devuelve una corrutina
+        max_concurrency (int): Máximo de peticiones HTTP simultáneas
+
+    Returns:
+        Lo que devuelva la corrutina
+
+    Ejemplo:
+        run_engine(lambda engine: asyncio.gather(*[engine.tweet_responses(t) for t in ids]))
+    """
+
+    async def main():
+        async with AsyncFetchEngine(max_concurrency=max_concurrency) as engine:
+            return await operation(engine)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(main())
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, main()).result()
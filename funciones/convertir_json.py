@@ -1,21 +1,114 @@
 import json
+import os
 import pandas as pd
 from datetime import datetime
+from pandas.api.types import union_categoricals
+from funciones.entity_index import build_entity_index, save_entity_index
+from funciones.profile_cache import DEFAULT_CACHE_PATH, ProfileCache
+from funciones.profiling import ProfilingSession
 
-def tweets_to_csv(json_file_path):
+# Formato de fecha que devuelve la API de Twitter, ej: "Tue Jun 10 12:00:00 +0000 2025"
+TWITTER_DATE_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+# Formato con el que pandas escribe las columnas *_utc en los CSV, ej: "2025-06-10 12:00:00+0000"
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S%z'
+
+# Columnas con IDs de Twitter (enteros de hasta 19 dígitos)
+ID_COLUMNS = ['tweet_id', 'reply_id', 'user_id', 'tweet_original_id', 'conversation_id',
+              'in_reply_to_id', 'in_reply_to_user_id', 'autor_id']
+
+# Tipos compactos para las columnas de los DataFrames convertidos.
+# Los IDs usan Int64 nullable: 8 bytes por valor y los vacíos no fuerzan el paso por float.
+COLUMN_SCHEMA = {
+    # IDs
+    **{column: 'Int64' for column in ID_COLUMNS},
+    
+    # Textos repetitivos
+    'type': 'category',
+    'idioma': 'category',
+    'fuente': 'category',
+    'in_reply_to_username': 'category',
+    'tipo_dataset': 'category',
+    'consulta': 'category',
+    'tipo_cuenta': 'category',
+    'tipo_verificacion': 'category',
+    'ultimo_cursor_disponible': 'category',
+    'continue_in_usado': 'category',
+    
+    # Booleanos (pueden venir vacíos)
+    'es_respuesta': 'boolean',
+    'autor_verificado': 'boolean',
+    'autor_verificado_azul': 'boolean',
+    'puede_dm': 'boolean',
+    'verificado': 'boolean',
+    'verificado_azul': 'boolean',
+    'protegido': 'boolean',
+    'tiene_timelines_custom': 'boolean',
+    'es_traductor': 'boolean',
+    'posiblemente_sensible': 'boolean',
+    'es_automatizado': 'boolean',
+    'no_disponible': 'boolean',
+    
+    # Conteos
+    'retweets': 'UInt32',
+    'respuestas': 'UInt32',
+    'likes': 'UInt32',
+    'citas': 'UInt32',
+    'visualizaciones': 'UInt64',
+    'bookmarks': 'UInt32',
+    'engagement_total': 'UInt32',
+    'autor_seguidores': 'UInt32',
+    'autor_siguiendo': 'UInt32',
+    'autor_tweets_count': 'UInt32',
+    'seguidores': 'UInt32',
+    'siguiendo': 'UInt32',
+    'favoritos_count': 'UInt32',
+    'media_count': 'UInt32',
+    'tweets_count': 'UInt32',
+    'numero_hashtags': 'UInt8',
+    'numero_urls': 'UInt8',
+    'numero_menciones': 'UInt8',
+    'numero_bio_urls': 'UInt8',
+    'numero_paises_restringidos': 'UInt16',
+    'numero_tweets_fijados': 'UInt8',
+    'ratio_seguidores_siguiendo': 'float32',
+    
+    # Columnas derivadas de fechas
+    'fecha_creacion_epoch': 'Int64',
+    'fecha_creacion_hora': 'Int8',
+    'autor_fecha_creacion_epoch': 'Int64',
+    'autor_fecha_creacion_hora': 'Int8'
+}
+
+# Columna que identifica cada fila según el tipo de dataset (respuestas, tweets, retweeters)
+ROW_ID_COLUMNS = ['reply_id', 'tweet_id', 'user_id']
+
+def tweets_to_csv(json_file_path, partition_dir=None, entity_index=False, output_path=None, report=False):
     """
     Convierte un archivo JSON de búsqueda de tweets (twitter_api_response) a CSV
     
     Args:
         json_file_path (str): Ruta completa al archivo JSON de tweets
+        partition_dir (str, optional): Si se proporciona, en lugar de un único CSV se escribe
+                                       un dataset particionado por conversación y fecha de
+                                       creación dentro de este directorio.
+        entity_index (bool): Si es True, también guarda un índice invertido de hashtags,
+                             menciones y URLs (.npz) junto a la salida.
+        output_path (str, optional): Ruta del CSV a generar. Si es None, se genera un nombre
+                                     con la fecha y hora actual en el directorio de trabajo.
+        report (bool): Si es True, imprime el ahorro de memoria por columna de los tipos compactos.
     
     Returns:
-        str: Ruta del archivo CSV generado
+        str: Ruta del archivo CSV generado (o del directorio del dataset particionado)
     """
     
     print(f"🐦 Convirtiendo tweets a CSV: {json_file_path}")
     
+    perf = ProfilingSession('tweets_to_csv')
+    
     try:
+        perf.mark('cargar_json')
+        
         # Cargar el archivo JSON
         with open(json_file_path, 'r', encoding='utf-8') as file:
             data = json.load(file)
@@ -27,7 +120,8 @@ def tweets_to_csv(json_file_path):
                 'total_tweets': data.get('total_tweets', len(tweets)),
                 'total_paginas': data.get('total_paginas', 'No especificado'),
                 'fecha_obtencion': data.get('fecha_obtencion', 'No especificada'),
-                'ultimo_cursor': data.get('ultimo_cursor', 'No especificado')
+                'ultimo_cursor': data.get('ultimo_cursor', 'No especificado'),
+                'consulta': data.get('consulta')
             }
         else:
             tweets = data  # Formato directo
@@ -35,6 +129,8 @@ def tweets_to_csv(json_file_path):
         
         print(f"📊 Encontrados {len(tweets)} tweets para procesar")
         
+        perf.mark('procesar_registros', cpu=True)
+        
         # Procesar tweets
         tweets_data = []
         for i, tweet in enumerate(tweets, 1):
@@ -95,46 +191,85 @@ def tweets_to_csv(json_file_path):
                 'numero_menciones': len(user_mentions),
                 'menciones': ', '.join([m.get('screen_name', '') for m in user_mentions]),
                 'tipo_dataset': 'busqueda',
+                'consulta': tweet.get('consulta', metadata.get('consulta')),
                 'ultimo_cursor_disponible': metadata.get('ultimo_cursor', 'No especificado')
             })
             
             tweets_data.append(tweet_info)
         
+        perf.mark('dataframe')
+        
         # Crear DataFrame y archivo CSV
         df = pd.DataFrame(tweets_data)
         
+        # Fechas parseadas una sola vez con el formato fijo de Twitter
+        add_parsed_date_columns(df, 'fecha_creacion')
+        add_parsed_date_columns(df, 'autor_fecha_creacion')
+        df = apply_schema(df, report=report)
+        
+        perf.mark('escribir')
+        
+        if partition_dir:
+            write_partitioned_dataset(df, partition_dir, 'conversation_id', json_file_path)
+            if entity_index:
+                origen = os.path.splitext(os.path.basename(json_file_path))[0]
+                os.makedirs(os.path.join(partition_dir, '_entidades'), exist_ok=True)
+                save_entity_index(build_entity_index(df, 'tweet_id'),
+                                  os.path.join(partition_dir, '_entidades', f'{origen}.npz'))
+            print(f"📊 Total de tweets procesados: {len(tweets_data)}")
+            perf.finish(partition_dir)
+            return partition_dir
+        
         # Generar nombre del archivo CSV
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_filename = f'tweets_search_{timestamp}_{len(tweets_data)}tweets.csv'
+        csv_filename = output_path or f'tweets_search_{timestamp}_{len(tweets_data)}tweets.csv'
         
         # Guardar CSV
         df.to_csv(csv_filename, index=False, encoding='utf-8')
+        if entity_index:
+            save_entity_index(build_entity_index(df, 'tweet_id'), os.path.splitext(csv_filename)[0] + '_entidades.npz')
         
         print(f"✅ CSV generado: {csv_filename}")
         print(f"📊 Total de tweets procesados: {len(tweets_data)}")
         if metadata.get('ultimo_cursor') != 'No especificado':
             print(f"🔄 Último cursor disponible: {metadata['ultimo_cursor'][:20]}...")
         
+        perf.finish(csv_filename)
         return csv_filename
         
     except Exception as e:
+        perf.finish(json_file_path)
         print(f"❌ Error al convertir tweets: {e}")
         return None
+    finally:
+        perf.close()
 
-def replies_to_csv(json_file_path):
+def replies_to_csv(json_file_path, partition_dir=None, entity_index=False, output_path=None, report=False):
     """
     Convierte un archivo JSON de respuestas de tweet (twitter_replies) a CSV
     
     Args:
         json_file_path (str): Ruta completa al archivo JSON de respuestas
+        partition_dir (str, optional): Si se proporciona, en lugar de un único CSV se escribe
+                                       un dataset particionado por tweet original y fecha de
+                                       creación dentro de este directorio.
+        entity_index (bool): Si es True, también guarda un índice invertido de hashtags,
+                             menciones y URLs (.npz) junto a la salida.
+        output_path (str, optional): Ruta del CSV a generar. Si es None, se genera un nombre
+                                     con la fecha y hora actual en el directorio de trabajo.
+        report (bool): Si es True, imprime el ahorro de memoria por columna de los tipos compactos.
     
     Returns:
-        str: Ruta del archivo CSV generado
+        str: Ruta del archivo CSV generado (o del directorio del dataset particionado)
     """
     
     print(f"💬 Convirtiendo respuestas a CSV: {json_file_path}")
     
+    perf = ProfilingSession('replies_to_csv')
+    
     try:
+        perf.mark('cargar_json')
+        
         # Cargar el archivo JSON
         with open(json_file_path, 'r', encoding='utf-8') as file:
             data = json.load(file)
@@ -152,11 +287,14 @@ def replies_to_csv(json_file_path):
             }
         else:
             print("❌ El archivo no contiene el campo 'replies'")
+            perf.finish(json_file_path)
             return None
         
         print(f"📊 Encontradas {len(replies)} respuestas para procesar")
         print(f"🎯 Tweet original: {metadata['tweet_id_original']}")
         
+        perf.mark('procesar_registros', cpu=True)
+        
         # Procesar respuestas
         replies_data = []
         for i, reply in enumerate(replies, 1):
@@ -224,16 +362,39 @@ def replies_to_csv(json_file_path):
             
             replies_data.append(reply_info)
         
+        perf.mark('dataframe')
+        
         # Crear DataFrame y archivo CSV
         df = pd.DataFrame(replies_data)
         
+        # Fechas parseadas una sola vez con el formato fijo de Twitter
+        add_parsed_date_columns(df, 'fecha_creacion')
+        add_parsed_date_columns(df, 'autor_fecha_creacion')
+        df = apply_schema(df, report=report)
+        
+        perf.mark('escribir')
+        
+        if partition_dir:
+            write_partitioned_dataset(df, partition_dir, 'tweet_original_id', json_file_path)
+            if entity_index:
+                origen = os.path.splitext(os.path.basename(json_file_path))[0]
+                os.makedirs(os.path.join(partition_dir, '_entidades'), exist_ok=True)
+                save_entity_index(build_entity_index(df, 'reply_id'),
+                                  os.path.join(partition_dir, '_entidades', f'{origen}.npz'))
+            print(f"📊 Total de respuestas procesadas: {len(replies_data)}")
+            print(f"🎯 Tweet original: {metadata['tweet_id_original']}")
+            perf.finish(partition_dir)
+            return partition_dir
+        
         # Generar nombre del archivo CSV
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         tweet_id_short = metadata['tweet_id_original'][:10] if metadata['tweet_id_original'] != 'No especificado' else 'unknown'
-        csv_filename = f'replies_{tweet_id_short}_{timestamp}_{len(replies_data)}replies.csv'
+        csv_filename = output_path or f'replies_{tweet_id_short}_{timestamp}_{len(replies_data)}replies.csv'
         
         # Guardar CSV
         df.to_csv(csv_filename, index=False, encoding='utf-8')
+        if entity_index:
+            save_entity_index(build_entity_index(df, 'reply_id'), os.path.splitext(csv_filename)[0] + '_entidades.npz')
         
         print(f"✅ CSV generado: {csv_filename}")
         print(f"📊 Total de respuestas procesadas: {len(replies_data)}")
@@ -243,18 +404,28 @@ def replies_to_csv(json_file_path):
         if metadata['parametros'].get('continue_in'):
             print(f"⚡ Se usó continue_in: {metadata['parametros']['continue_in'][:20]}...")
         
+        perf.finish(csv_filename)
         return csv_filename
         
     except Exception as e:
+        perf.finish(json_file_path)
         print(f"❌ Error al convertir respuestas: {e}")
         return None
+    finally:
+        perf.close()
 
-def retweets_to_csv(json_file_path):
+def retweets_to_csv(json_file_path, profile_cache=None, output_path=None, report=False):
     """
     Convierte un archivo JSON de retweeters de tweet (twitter_retweeters) a CSV
     
     Args:
         json_file_path (str): Ruta completa al archivo JSON de retweeters
+        profile_cache (str, optional): Ruta de la caché de perfiles. Solo se usa si el JSON
+                                       guarda IDs ('retweeter_ids'); por defecto se toma la
+                                       ruta registrada en el propio JSON.
+        output_path (str, optional): Ruta del CSV a generar. Si es None, se genera un nombre
+                                     con la fecha y hora actual en el directorio de trabajo.
+        report (bool): Si es True, imprime el ahorro de memoria por columna de los tipos compactos.
     
     Returns:
         str: Ruta del archivo CSV generado
@@ -262,142 +433,484 @@ def retweets_to_csv(json_file_path):
     
     print(f"🔄 Convirtiendo retweeters a CSV: {json_file_path}")
     
+    perf = ProfilingSession('retweets_to_csv')
+    
     try:
+        perf.mark('cargar_json')
+        
         # Cargar el archivo JSON
         with open(json_file_path, 'r', encoding='utf-8') as file:
             data = json.load(file)
         
-        # Extraer los retweeters
+        # Extraer los retweeters (perfiles completos o IDs que referencian la caché)
         if 'retweeters' in data:
             retweeters = data['retweeters']
-            metadata = {
-                'tweet_id_original': data.get('tweet_id', 'No especificado'),
-                'total_retweeters': data.get('total_retweeters', len(retweeters)),
-                'total_paginas': data.get('total_paginas', 'No especificado'),
-                'fecha_obtencion': data.get('fecha_obtencion', 'No especificada'),
-                'ultimo_cursor': data.get('ultimo_cursor', 'No especificado'),
-                'parametros': data.get('parametros', {})
-            }
+            retweeter_ids = [str(r.get('id')) for r in retweeters]
+        elif 'retweeter_ids' in data:
+            retweeter_ids = data['retweeter_ids']
+            cache_path = profile_cache or data.get('cache_perfiles', DEFAULT_CACHE_PATH)
+            
+            # Lectura en bloque; se aceptan perfiles vencidos porque son los que se descargaron
+            with ProfileCache(cache_path) as cache:
+                cached = cache.get_many(retweeter_ids, include_expired=True)
+            retweeters = list(cached.values())
+            
+            missing = len(set(retweeter_ids)) - len(cached)
+            print(f"👤 Perfiles leídos de la caché {cache_path}: {len(cached)}")
+            if missing:
+                print(f"⚠️  {missing} perfiles ya no están en la caché; solo se conservará su user_id")
         else:
             print("❌ El archivo no contiene el campo 'retweeters'")
+            perf.finish(json_file_path)
             return None
         
-        print(f"📊 Encontrados {len(retweeters)} retweeters para procesar")
+        metadata = {
+            'tweet_id_original': data.get('tweet_id', 'No especificado'),
+            'total_retweeters': data.get('total_retweeters', len(retweeter_ids)),
+            'total_paginas': data.get('total_paginas', 'No especificado'),
+            'fecha_obtencion': data.get('fecha_obtencion', 'No especificada'),
+            'ultimo_cursor': data.get('ultimo_cursor', 'No especificado'),
+            'parametros': data.get('parametros', {})
+        }
+        
+        print(f"📊 Encontrados {len(retweeter_ids)} retweeters para procesar")
         print(f"🎯 Tweet original: {metadata['tweet_id_original']}")
         
-        # Procesar retweeters
-        retweeters_data = []
+        perf.mark('procesar_registros', cpu=True)
+        
+        # Aplanar cada perfil distinto una sola vez
+        profiles = {}
         for i, retweeter in enumerate(retweeters, 1):
             if i % 100 == 0:
                 print(f"⏳ Procesando retweeter {i}/{len(retweeters)}...")
             
-            # Información básica del retweeter
-            retweeter_info = {
-                'user_id': retweeter.get('id'),
-                'tweet_original_id': metadata['tweet_id_original'],
-                'type': retweeter.get('type'),
-                'username': retweeter.get('userName'),
-                'nombre': retweeter.get('name'),
-                'url_perfil': retweeter.get('url'),
-                'descripcion': retweeter.get('description'),
-                'ubicacion': retweeter.get('location'),
-                'seguidores': retweeter.get('followers', 0),
-                'siguiendo': retweeter.get('following', 0),
-                'puede_dm': retweeter.get('canDm', False),
-                'fecha_creacion': retweeter.get('createdAt'),
-                'favoritos_count': retweeter.get('favouritesCount', 0),
-                'media_count': retweeter.get('mediaCount', 0),
-                'tweets_count': retweeter.get('statusesCount', 0),
-                'verificado': retweeter.get('verified', False),
-                'verificado_azul': retweeter.get('isBlueVerified', False),
-                'tipo_verificacion': retweeter.get('verifiedType', ''),
-                'foto_perfil': retweeter.get('profilePicture'),
-                'foto_portada': retweeter.get('coverPicture'),
-                'protegido': retweeter.get('protected', False),
-                'tiene_timelines_custom': retweeter.get('hasCustomTimelines', False),
-                'es_traductor': retweeter.get('isTranslator', False),
-                'posiblemente_sensible': retweeter.get('possiblySensitive', False),
-                'es_automatizado': retweeter.get('isAutomated', False),
-                'automatizado_por': retweeter.get('automatedBy'),
-                'no_disponible': retweeter.get('unavailable', False),
-                'razon_no_disponible': retweeter.get('unavailableReason'),
-                'mensaje': retweeter.get('message')
-            }
-            
-            # Información adicional de perfil
-            profile_bio = retweeter.get('profile_bio', {})
-            if profile_bio:
-                retweeter_info.update({
-                    'bio_descripcion': profile_bio.get('description', ''),
-                })
-                
-                # Extraer URLs de la bio si existen
-                entities = profile_bio.get('entities', {})
-                if entities:
-                    description_entities = entities.get('description', {})
-                    url_entities = entities.get('url', {})
-                    
-                    bio_urls = []
-                    if description_entities.get('urls'):
-                        bio_urls.extend([url.get('expanded_url', '') for url in description_entities['urls']])
-                    if url_entities.get('urls'):
-                        bio_urls.extend([url.get('expanded_url', '') for url in url_entities['urls']])
-                    
-                    retweeter_info.update({
-                        'bio_urls': ', '.join(bio_urls),
-                        'numero_bio_urls': len(bio_urls)
-                    })
-            
-            # Información de países restringidos
-            withheld_countries = retweeter.get('withheldInCountries', [])
-            retweeter_info.update({
-                'paises_restringidos': ', '.join(withheld_countries),
-                'numero_paises_restringidos': len(withheld_countries)
-            })
-            
-            # Tweets fijados
-            pinned_tweets = retweeter.get('pinnedTweetIds', [])
-            retweeter_info.update({
-                'tweets_fijados': ', '.join(pinned_tweets),
-                'numero_tweets_fijados': len(pinned_tweets)
-            })
-            
-            # Métricas de engagement potencial
-            followers = retweeter.get('followers', 0)
-            following = retweeter.get('following', 0)
-            
-            retweeter_info.update({
-                'ratio_seguidores_siguiendo': round(followers / following, 2) if following > 0 else 0,
-                'tipo_cuenta': 'Popular' if followers > 10000 else 'Micro-influencer' if followers > 1000 else 'Regular',
-                'tipo_dataset': 'retweeter',
-                'ultimo_cursor_disponible': metadata.get('ultimo_cursor', 'No especificado'),
-                'continue_in_usado': metadata['parametros'].get('continue_in', 'No especificado')
-            })
-            
-            retweeters_data.append(retweeter_info)
+            user_id = str(retweeter.get('id'))
+            if user_id not in profiles:
+                profiles[user_id] = {**_flatten_retweeter(retweeter), 'user_id': user_id}
         
-        # Crear DataFrame y archivo CSV
-        df = pd.DataFrame(retweeters_data)
+        perf.mark('dataframe')
+        
+        # Unir los perfiles con la lista de retweeters en bloque
+        profiles_df = pd.DataFrame(list(profiles.values())) if profiles else pd.DataFrame({'user_id': []})
+        df = pd.DataFrame({'user_id': retweeter_ids}).merge(profiles_df, on='user_id', how='left')
+        df.insert(1, 'tweet_original_id', metadata['tweet_id_original'])
+        df['tipo_dataset'] = 'retweeter'
+        df['ultimo_cursor_disponible'] = metadata.get('ultimo_cursor', 'No especificado')
+        df['continue_in_usado'] = metadata['parametros'].get('continue_in', 'No especificado')
+        
+        # Fechas parseadas una sola vez con el formato fijo de Twitter
+        add_parsed_date_columns(df, 'fecha_creacion')
+        df = apply_schema(df, report=report)
+        
+        perf.mark('escribir')
         
         # Generar nombre del archivo CSV
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         tweet_id_short = metadata['tweet_id_original'][:10] if metadata['tweet_id_original'] != 'No especificado' else 'unknown'
-        csv_filename = f'retweeters_{tweet_id_short}_{timestamp}_{len(retweeters_data)}retweeters.csv'
+        csv_filename = output_path or f'retweeters_{tweet_id_short}_{timestamp}_{len(df)}retweeters.csv'
         
         # Guardar CSV
         df.to_csv(csv_filename, index=False, encoding='utf-8')
         
         print(f"✅ CSV generado: {csv_filename}")
-        print(f"📊 Total de retweeters procesados: {len(retweeters_data)}")
+        print(f"📊 Total de retweeters procesados: {len(df)}")
         print(f"🎯 Tweet original: {metadata['tweet_id_original']}")
         if metadata.get('ultimo_cursor') != 'No especificado':
             print(f"🔄 Último cursor disponible: {metadata['ultimo_cursor'][:20]}...")
         if metadata['parametros'].get('continue_in'):
             print(f"⚡ Se usó continue_in: {metadata['parametros']['continue_in'][:20]}...")
         
+        perf.finish(csv_filename)
         return csv_filename
         
     except Exception as e:
+        perf.finish(json_file_path)
         print(f"❌ Error al convertir retweeters: {e}")
         return None
+    finally:
+        perf.close()
+
+def _flatten_retweeter(retweeter):
+    """
+    Aplana un perfil de retweeter a una fila del CSV (sin los campos propios del dataset).
+    
+    Args:
+        retweeter (dict): Perfil de usuario tal como lo devuelve la API
+    
+    Returns:
+        dict: Campos del perfil con los nombres de columna del CSV
+    """
+    
+    # Información básica del retweeter
+    retweeter_info = {
+        'user_id': retweeter.get('id'),
+        'type': retweeter.get('type'),
+        'username': retweeter.get('userName'),
+        'nombre': retweeter.get('name'),
+        'url_perfil': retweeter.get('url'),
+        'descripcion': retweeter.get('description'),
+        'ubicacion': retweeter.get('location'),
+        'seguidores': retweeter.get('followers', 0),
+        'siguiendo': retweeter.get('following', 0),
+        'puede_dm': retweeter.get('canDm', False),
+        'fecha_creacion': retweeter.get('createdAt'),
+        'favoritos_count': retweeter.get('favouritesCount', 0),
+        'media_count': retweeter.get('mediaCount', 0),
+        'tweets_count': retweeter.get('statusesCount', 0),
+        'verificado': retweeter.get('verified', False),
+        'verificado_azul': retweeter.get('isBlueVerified', False),
+        'tipo_verificacion': retweeter.get('verifiedType', ''),
+        'foto_perfil': retweeter.get('profilePicture'),
+        'foto_portada': retweeter.get('coverPicture'),
+        'protegido': retweeter.get('protected', False),
+        'tiene_timelines_custom': retweeter.get('hasCustomTimelines', False),
+        'es_traductor': retweeter.get('isTranslator', False),
+        'posiblemente_sensible': retweeter.get('possiblySensitive', False),
+        'es_automatizado': retweeter.get('isAutomated', False),
+        'automatizado_por': retweeter.get('automatedBy'),
+        'no_disponible': retweeter.get('unavailable', False),
+        'razon_no_disponible': retweeter.get('unavailableReason'),
+        'mensaje': retweeter.get('message')
+    }
+    
+    # Información adicional de perfil
+    profile_bio = retweeter.get('profile_bio', {})
+    if profile_bio:
+        retweeter_info.update({
+            'bio_descripcion': profile_bio.get('description', ''),
+        })
+        
+        # Extraer URLs de la bio si existen
+        entities = profile_bio.get('entities', {})
+        if entities:
+            description_entities = entities.get('description', {})
+            url_entities = entities.get('url', {})
+            
+            bio_urls = []
+            if description_entities.get('urls'):
+                bio_urls.extend([url.get('expanded_url', '') for url in description_entities['urls']])
+            if url_entities.get('urls'):
+                bio_urls.extend([url.get('expanded_url', '') for url in url_entities['urls']])
+            
+            retweeter_info.update({
+                'bio_urls': ', '.join(bio_urls),
+                'numero_bio_urls': len(bio_urls)
+            })
+    
+    # Información de países restringidos
+    withheld_countries = retweeter.get('withheldInCountries', [])
+    retweeter_info.update({
+        'paises_restringidos': ', '.join(withheld_countries),
+        'numero_paises_restringidos': len(withheld_countries)
+    })
+    
+    # Tweets fijados
+    pinned_tweets = retweeter.get('pinnedTweetIds', [])
+    retweeter_info.update({
+        'tweets_fijados': ', '.join(pinned_tweets),
+        'numero_tweets_fijados': len(pinned_tweets)
+    })
+    
+    # Métricas de engagement potencial
+    followers = retweeter.get('followers', 0)
+    following = retweeter.get('following', 0)
+    
+    retweeter_info.update({
+        'ratio_seguidores_siguiendo': round(followers / following, 2) if following > 0 else 0,
+        'tipo_cuenta': 'Popular' if followers > 10000 else 'Micro-influencer' if followers > 1000 else 'Regular'
+    })
+    
+    return retweeter_info
+
+def write_partitioned_dataset(df, partition_dir, id_column, json_file_path, date_column='fecha_creacion'):
+    """
+    Escribe un DataFrame convertido como dataset particionado en disco.
+    
+    La estructura es estilo Hive: {partition_dir}/{id_column}={id}/fecha={YYYY-MM-DD}/part-{origen}.csv.
+    El nombre de cada parte se deriva del JSON de origen, de modo que volver a convertir el mismo
+    archivo sobrescribe sus partes en lugar de duplicarlas.
+    
+    Args:
+        df (pd.DataFrame): DataFrame generado por alguno de los convertidores
+        partition_dir (str): Directorio raíz del dataset
+        id_column (str): Columna usada para el primer nivel de partición
+        json_file_path (str): Ruta del JSON de origen (se usa para nombrar las partes)
+        date_column (str): Columna con la fecha de creación en formato Twitter
+    
+    Returns:
+        list: Rutas de los archivos escritos
+    """
+    
+    if f'{date_column}_dia' not in df.columns:
+        add_parsed_date_columns(df, date_column)
+    dias = df[f'{date_column}_dia'].fillna('sin_fecha')
+    ids = df[id_column].astype('string').fillna('unknown')
+    
+    origen = os.path.splitext(os.path.basename(json_file_path))[0]
+    archivos = []
+    
+    for (id_valor, dia), grupo in df.groupby([ids, dias], sort=True):
+        directorio = os.path.join(partition_dir, f'{id_column}={id_valor}', f'fecha={dia}')
+        os.makedirs(directorio, exist_ok=True)
+        
+        ruta = os.path.join(directorio, f'part-{origen}.csv')
+        grupo.to_csv(ruta, index=False, encoding='utf-8')
+        archivos.append(ruta)
+    
+    print(f"✅ Dataset particionado actualizado: {partition_dir}")
+    print(f"🗂️  Particiones escritas: {len(archivos)}")
+    
+    return archivos
 
+def read_partitioned_dataset(partition_dir, tweet_ids=None, start_date=None, end_date=None, columns=None):
+    """
+    Lee un dataset particionado descartando particiones y columnas que no se necesitan.
+    
+    Los filtros se aplican sobre los nombres de los directorios, así que solo se abren
+    los archivos que pertenecen a los tweets y al rango de fechas pedidos.
+    
+    Args:
+        partition_dir (str): Directorio raíz del dataset
+        tweet_ids (iterable, optional): IDs del primer nivel de partición a incluir. Si es None, todos.
+        start_date (str, optional): Fecha inicial inclusiva en formato 'YYYY-MM-DD'
+        end_date (str, optional): Fecha final inclusiva en formato 'YYYY-MM-DD'
+        columns (list, optional): Columnas a cargar. Si es None, todas.
+    
+    Returns:
+        pd.DataFrame: Filas de las particiones seleccionadas, sin repetir registros que
+                      aparecen en varios archivos (descargas con ventanas solapadas)
+    """
+    
+    tweet_ids = {str(t) for t in tweet_ids} if tweet_ids is not None else None
+    partes = []
+    
+    for carpeta_id in sorted(os.listdir(partition_dir)):
+        ruta_id = os.path.join(partition_dir, carpeta_id)
+        if not os.path.isdir(ruta_id) or '=' not in carpeta_id:
+            continue
+        
+        id_valor = carpeta_id.split('=', 1)[1]
+        if tweet_ids is not None and id_valor not in tweet_ids:
+            continue
+        
+        for carpeta_fecha in sorted(os.listdir(ruta_id)):
+            if not carpeta_fecha.startswith('fecha='):
+                continue
+            
+            # Las fechas ISO se pueden comparar como texto
+            dia = carpeta_fecha.split('=', 1)[1]
+            if dia == 'sin_fecha' and (start_date or end_date):
+                continue
+            if start_date and dia < start_date:
+                continue
+            if end_date and dia > end_date:
+                continue
+            
+            ruta_fecha = os.path.join(ruta_id, carpeta_fecha)
+            for archivo in sorted(os.listdir(ruta_fecha)):
+                if archivo.endswith('.csv'):
+                    partes.append(os.path.join(ruta_fecha, archivo))
+    
+    print(f"📂 Particiones seleccionadas: {len(partes)} archivos")
+    
+    if not partes:
+        return pd.DataFrame(columns=columns)
+    
+    # La columna identificadora se carga aunque no se pida, para poder deduplicar
+    read_columns = list(columns) + [c for c in ROW_ID_COLUMNS if c not in columns] if columns else None
+    df = concat_converted([load_converted_csv(parte, columns=read_columns) for parte in partes])
+    
+    # Los archivos se leen en orden de nombre; ante repetidos se conserva la última copia
+    id_column = next((c for c in ROW_ID_COLUMNS if c in df.columns), None)
+    if id_column is not None:
+        total = len(df)
+        df = df[df[id_column].isna() | ~df.duplicated(subset=[id_column], keep='last')].reset_index(drop=True)
+        if len(df) < total:
+            print(f"🔁 Registros repetidos entre archivos descartados: {total - len(df)}")
+    
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+def add_parsed_date_columns(df, column):
+    """
+    Agrega columnas de fecha tipadas a partir de una columna en formato Twitter.
+    
+    El parseo se hace de forma vectorizada con el formato fijo, sin inferencia por fila.
+    Se agregan {column}_utc (datetime64 UTC), {column}_epoch (segundos unix),
+    {column}_hora (0-23, UTC) y {column}_dia ('YYYY-MM-DD', UTC). La columna original se conserva.
+    
+    Args:
+        df (pd.DataFrame): DataFrame a modificar en sitio
+        column (str): Nombre de la columna con fechas tipo "Tue Jun 10 12:00:00 +0000 2025"
+    
+    Returns:
+        pd.DataFrame: El mismo DataFrame con las columnas nuevas
+    """
+    
+    if column not in df.columns:
+        return df
+    
+    fechas = pd.to_datetime(df[column], format=TWITTER_DATE_FORMAT, utc=True, errors='coerce')
+    
+    df[f'{column}_utc'] = fechas
+    df[f'{column}_epoch'] = ((fechas - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).astype('Int64')
+    df[f'{column}_hora'] = fechas.dt.hour.astype('Int8')
+    df[f'{column}_dia'] = fechas.dt.strftime('%Y-%m-%d')
+    
+    return df
+
+def load_converted_csv(csv_path, columns=None, chunksize=None, skiprows=None):
+    """
+    Carga un CSV generado por los convertidores restaurando los tipos de las columnas de fecha.
+    
+    Las columnas *_utc se escriben en ISO 8601, así que se parsean con formato fijo
+    en lugar de dejar que pandas infiera el formato fila por fila.
+    
+    Args:
+        csv_path (str): Ruta del CSV generado
+        columns (list, optional): Columnas a cargar. Si es None, todas.
+        chunksize (int, optional): Si se proporciona, se devuelve un iterador de bloques
+                                   de este número de filas en lugar de un único DataFrame.
+        skiprows (callable, optional): Filas a omitir, tal como en pd.read_csv. Conviene una
+                                       función: lambda i: 0 < i <= n salta las primeras n filas
+                                       de datos sin parsearlas, conserva el encabezado y no
+                                       guarda en memoria un índice por fila saltada. Las filas
+                                       se cuentan como registros, así que los textos con saltos
+                                       de línea entre comillas no desplazan la cuenta.
+    
+    Returns:
+        pd.DataFrame: DataFrame con las columnas de fecha como datetime64 UTC
+                      (o un iterador de DataFrames si se usa chunksize)
+    """
+    
+    usecols = (lambda c: c in columns) if columns else None
+    
+    # Los IDs se leen como texto para no pasar por float; apply_schema los convierte a Int64
+    id_dtypes = {c: 'string' for c in ID_COLUMNS}
+    
+    if chunksize:
+        reader = pd.read_csv(csv_path, usecols=usecols, dtype=id_dtypes, skiprows=skiprows, chunksize=chunksize)
+        return (_restore_types(chunk) for chunk in reader)
+    
+    return _restore_types(pd.read_csv(csv_path, usecols=usecols, dtype=id_dtypes, skiprows=skiprows))
+
+def _restore_types(df):
+    """Parsea las columnas *_utc y aplica COLUMN_SCHEMA a un DataFrame leído de CSV."""
+    
+    for column in df.columns:
+        if column.endswith('_utc'):
+            df[column] = pd.to_datetime(df[column], format=CSV_DATE_FORMAT, utc=True, errors='coerce')
+    
+    return apply_schema(df)
+
+def apply_schema(df, report=False):
+    """
+    Convierte las columnas conocidas de un DataFrame a los tipos compactos de COLUMN_SCHEMA.
+    
+    Las columnas que no están en el esquema se dejan igual. Si una columna no se puede
+    convertir (por ejemplo, un conteo negativo), se conserva su tipo original.
+    El DataFrame se modifica en sitio para no duplicar la memoria en archivos grandes.
+    
+    Args:
+        df (pd.DataFrame): DataFrame generado por alguno de los convertidores
+        report (bool): Si es True, imprime el ahorro de memoria por columna
+    
+    Returns:
+        pd.DataFrame: El mismo DataFrame con los tipos compactos
+    """
+    
+    before = df.copy() if report else None
+    
+    for column, dtype in COLUMN_SCHEMA.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        
+        try:
+            if column in ID_COLUMNS:
+                df[column] = _ids_to_int64(df[column])
+            elif dtype.startswith(('UInt', 'Int', 'float')):
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+            else:
+                df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError, OverflowError) as e:
+            print(f"⚠️  No se pudo convertir '{column}' a {dtype}: {e}")
+    
+    if report:
+        memory_usage_report(before, df)
+    
+    return df
+
+def concat_converted(frames):
+    """
+    Une DataFrames cargados por separado con load_converted_csv sin perder los tipos compactos.
+    
+    pd.concat convierte a object las columnas categóricas cuyas categorías difieren entre
+    archivos (ej. el cursor de cada descarga), así que antes se unifican las categorías.
+    
+    Args:
+        frames (list): DataFrames con COLUMN_SCHEMA aplicado
+    
+    Returns:
+        pd.DataFrame: Todas las filas, con los tipos de COLUMN_SCHEMA
+    """
+    
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    
+    for column, dtype in COLUMN_SCHEMA.items():
+        if dtype != 'category':
+            continue
+        present = [frame for frame in frames if column in frame.columns]
+        if len(present) < 2:
+            continue
+        categories = union_categoricals([frame[column].astype('category') for frame in present]).categories
+        for frame in present:
+            frame[column] = frame[column].astype('category').cat.set_categories(categories)
+    
+    # Cubre columnas que faltan en algunos archivos (quedan como object al concatenar)
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+def _ids_to_int64(series):
+    """
+    Convierte una columna de IDs a Int64 sin pasar por float.
+    
+    Los valores que no son enteros (vacíos o textos como 'No especificado') quedan como <NA>.
+    """
+    
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype('Int64')
+    
+    texts = series.astype('string').str.strip()
+    return texts.where(texts.str.fullmatch(r'\d+')).astype('Int64')
+
+def memory_usage_report(df_before, df_after):
+    """
+    Compara el uso de memoria por columna de dos versiones de un DataFrame.
+    
+    Args:
+        df_before (pd.DataFrame): DataFrame original
+        df_after (pd.DataFrame): DataFrame con los tipos compactos
+    
+    Returns:
+        pd.DataFrame: Bytes antes y después, ahorro absoluto y porcentual por columna
+    """
+    
+    report = pd.DataFrame({
+        'antes_bytes': df_before.memory_usage(deep=True, index=False),
+        'despues_bytes': df_after.memory_usage(deep=True, index=False)
+    }).fillna(0).astype('int64')
+    report['ahorro_bytes'] = report['antes_bytes'] - report['despues_bytes']
+    report['ahorro_pct'] = (100 * report['ahorro_bytes'] / report['antes_bytes'].where(report['antes_bytes'] > 0)).round(1)
+    report = report.sort_values('ahorro_bytes', ascending=False)
+    
+    total_before = report['antes_bytes'].sum()
+    total_after = report['despues_bytes'].sum()
+    
+    print("🧮 Uso de memoria por columna:")
+    print(report.to_string())
+    print(f"📦 Total: {total_before / 1024**2:.2f} MB → {total_after / 1024**2:.2f} MB "
+          f"({100 * (total_before - total_after) / max(total_before, 1):.1f}% de ahorro)")
+    
+    return report
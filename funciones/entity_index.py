@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+# Columnas de entidades que generan los convertidores (texto unido con ', ')
+ENTITY_COLUMNS = {
+    'hashtags': 'hashtags',
+    'menciones': 'menciones',
+    'urls': 'urls'
+}
+
+# Hashtags y menciones no distinguen mayúsculas en Twitter
+CASE_INSENSITIVE = {'hashtags', 'menciones'}
+
+def build_entity_index(df, id_column):
+    """
+    Construye un índice invertido entidad → IDs de tweet a partir de un DataFrame convertido.
+
+    Para cada tipo de entidad se guarda un vocabulario ordenado y, en formato CSR,
+    los IDs (int64 ordenados) de los tweets donde aparece cada entidad. El vocabulario
+    también va en formato CSR: un solo buffer UTF-8 ({kind}_vocab_bytes) y los límites
+    de cada término ({kind}_vocab_offsets), así una URL larga no agranda las demás.
+    También se calculan los pares de hashtags que aparecen juntos en un mismo tweet.
+
+    Args:
+        df (pd.DataFrame): DataFrame generado por tweets_to_csv o replies_to_csv
+        id_column (str): Columna con el ID de cada fila ('tweet_id' o 'reply_id')
+
+    Returns:
+        dict: Arreglos numpy del índice, listos para save_entity_index
+    """
+
+    ids = pd.to_numeric(df[id_column], errors='coerce').astype('Int64')
+    index = {}
+
+    for kind, column in ENTITY_COLUMNS.items():
+        if column in df.columns:
+            entities = df[column].astype('string').fillna('').str.split(', ')
+        else:
+            entities = pd.Series([[]] * len(df), index=df.index)
+
+        pairs = pd.DataFrame({'entidad': entities, 'id': ids}).explode('entidad')
+        pairs = pairs[pairs['entidad'].notna() & (pairs['entidad'] != '') & pairs['id'].notna()]
+        if kind in CASE_INSENSITIVE:
+            pairs['entidad'] = pairs['entidad'].str.lower()
+        pairs = pairs.drop_duplicates().sort_values(['entidad', 'id'])
+
+        # El orden por punto de código coincide con el orden de los bytes UTF-8
+        entity_codes, vocab = pd.factorize(pairs['entidad'].to_numpy(dtype=object), sort=True)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entity_codes, minlength=len(vocab)), out=offsets[1:])
+
+        index[f'{kind}_vocab_bytes'], index[f'{kind}_vocab_offsets'] = _encode_vocab(vocab)
+        index[f'{kind}_offsets'] = offsets
+        index[f'{kind}_ids'] = pairs['id'].to_numpy(dtype=np.int64)
+
+        if kind == 'hashtags':
+            # Co-ocurrencias: pares (a, b) con a < b dentro del mismo tweet
+            codes = pd.DataFrame({
+                'codigo': entity_codes,
+                'id': pairs['id'].to_numpy(dtype=np.int64)
+            })
+            cooc = codes.merge(codes, on='id', suffixes=('_a', '_b'))
+            cooc = cooc[cooc['codigo_a'] < cooc['codigo_b']]
+            cooc = cooc.groupby(['codigo_a', 'codigo_b']).size().reset_index(name='n')
+
+            index['cooc_a'] = cooc['codigo_a'].to_numpy(dtype=np.int32)
+            index['cooc_b'] = cooc['codigo_b'].to_numpy(dtype=np.int32)
+            index['cooc_n'] = cooc['n'].to_numpy(dtype=np.int32)
+
+    return index
+
+def _encode_vocab(vocab):
+    """Concatena los términos en un buffer UTF-8 con sus límites (int64)."""
+
+    encoded = [term.encode('utf-8') for term in vocab]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(term) for term in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def _vocab_term(index, kind, pos):
+    """Término en la posición pos del vocabulario, como bytes UTF-8."""
+
+    offsets = index[f'{kind}_vocab_offsets']
+    return index[f'{kind}_vocab_bytes'][offsets[pos]:offsets[pos + 1]].tobytes()
+
+def _vocab_position(index, kind, entity):
+    """Búsqueda binaria de un término en el vocabulario. Devuelve su posición o None."""
+
+    target = entity.encode('utf-8')
+    low, high = 0, len(index[f'{kind}_vocab_offsets']) - 1
+    while low < high:
+        mid = (low + high) // 2
+        if _vocab_term(index, kind, mid) < target:
+            low = mid + 1
+        else:
+            high = mid
+
+    if low < len(index[f'{kind}_vocab_offsets']) - 1 and _vocab_term(index, kind, low) == target:
+        return low
+    return None
+
+def _vocab_terms(index, kind, positions):
+    """Decodifica solo los términos pedidos del vocabulario."""
+
+    unique, inverse = np.unique(positions, return_inverse=True)
+    terms = np.array([_vocab_term(index, kind, pos).decode('utf-8') for pos in unique], dtype=object)
+    return terms[inverse]
+
+def save_entity_index(index, index_path):
+    """
+    Guarda un índice de entidades en un archivo .npz comprimido.
+
+    Args:
+        index (dict): Índice generado por build_entity_index
+        index_path (str): Ruta del archivo .npz
+
+    Returns:
+        str: Ruta del archivo guardado
+    """
+
+    np.savez_compressed(index_path, **index)
+
+    total = sum(len(index[f'{kind}_vocab_offsets']) - 1 for kind in ENTITY_COLUMNS)
+    print(f"🗃️  Índice de entidades guardado: {index_path} ({total} entidades)")
+
+    return index_path
+
+def load_entity_index(index_path):
+    """
+    Carga un índice de entidades guardado con save_entity_index.
+
+    Args:
+        index_path (str): Ruta del archivo .npz
+
+    Returns:
+        dict: Arreglos numpy del índice
+    """
+
+    with np.load(index_path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def _as_indexes(indexes):
+    """Acepta una ruta, un índice o una lista de cualquiera de los dos."""
+
+    if isinstance(indexes, (str, dict)):
+        indexes = [indexes]
+    return [load_entity_index(i) if isinstance(i, str) else i for i in indexes]
+
+def find_entity(indexes, kind, entity):
+    """
+    Busca los tweets que contienen una entidad en uno o varios datasets.
+
+    Args:
+        indexes (str | dict | list): Ruta(s) .npz o índice(s) ya cargados
+        kind (str): 'hashtags', 'menciones' o 'urls'
+        entity (str): Hashtag (sin #), usuario (sin @) o URL expandida
+
+    Returns:
+        np.ndarray: IDs de tweet (int64) ordenados y sin repetir
+    """
+
+    if kind not in ENTITY_COLUMNS:
+        raise ValueError(f"Tipo de entidad no válido: {kind}. Usa uno de {list(ENTITY_COLUMNS)}")
+
+    entity = entity.lstrip('#@')
+    if kind in CASE_INSENSITIVE:
+        entity = entity.lower()
+
+    found = []
+    for index in _as_indexes(indexes):
+        pos = _vocab_position(index, kind, entity)
+        if pos is not None:
+            offsets = index[f'{kind}_offsets']
+            found.append(index[f'{kind}_ids'][offsets[pos]:offsets[pos + 1]])
+
+    if not found:
+        return np.array([], dtype=np.int64)
+    return np.unique(np.concatenate(found))
+
+def hashtag_cooccurrence(indexes, top=None):
+    """
+    Suma las co-ocurrencias de hashtags de uno o varios datasets.
+
+    Args:
+        indexes (str | dict | list): Ruta(s) .npz o índice(s) ya cargados
+        top (int, optional): Número de pares más frecuentes a devolver. Si es None, todos.
+
+    Returns:
+        pd.DataFrame: Columnas hashtag_a, hashtag_b y tweets, ordenadas de mayor a menor
+    """
+
+    frames = []
+    for index in _as_indexes(indexes):
+        frames.append(pd.DataFrame({
+            'hashtag_a': _vocab_terms(index, 'hashtags', index['cooc_a']),
+            'hashtag_b': _vocab_terms(index, 'hashtags', index['cooc_b']),
+            'tweets': index['cooc_n'].astype(np.int64)
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=['hashtag_a', 'hashtag_b', 'tweets'])
+
+    result = (pd.concat(frames, ignore_index=True)
+              .groupby(['hashtag_a', 'hashtag_b'], as_index=False)['tweets'].sum()
+              .sort_values('tweets', ascending=False, ignore_index=True))
+
+    return result.head(top) if top else result
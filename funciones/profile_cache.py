@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Ruta por defecto de la caché, junto a los JSON crudos
+DEFAULT_CACHE_PATH = 'raw_data/perfiles_cache.sqlite'
+
+# Un perfil se considera fresco durante una semana
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Máximo de perfiles guardados antes de desalojar los menos usados recientemente
+DEFAULT_MAX_PROFILES = 500_000
+
+# SQLite limita la cantidad de parámetros por consulta
+_BATCH_SIZE = 500
+
+class ProfileCache:
+    """
+    Caché local de perfiles de usuario indexada por user_id, con TTL y desalojo LRU.
+
+    Los perfiles se guardan una sola vez aunque la misma cuenta retuitee muchos tweets;
+    los JSON de retweeters pueden entonces guardar solo los IDs y referenciar la caché.
+
+    Como la caché es la única copia de los perfiles de esos JSON, put_many registra qué IDs
+    referencia cada JSON (tabla referencias) y el desalojo LRU (max_profiles) solo borra
+    perfiles que ningún JSON referencia. Al borrar un JSON crudo conviene liberar sus
+    referencias con release() o prune_references() para que sus perfiles se puedan desalojar.
+
+    La conexión se puede usar desde otros hilos (ej. asyncio.to_thread); un lock serializa
+    los accesos.
+
+    Uso:
+        with ProfileCache() as cache:
+            cache.put_many(perfiles, reference='raw_data/retweeters.json')
+            perfiles = cache.get_many(ids)
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_profiles=DEFAULT_MAX_PROFILES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_profiles = max_profiles
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS perfiles ("
+            " user_id TEXT PRIMARY KEY,"
+            " perfil TEXT NOT NULL,"
+            " actualizado REAL NOT NULL,"
+            " ultimo_acceso REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON perfiles (ultimo_acceso)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS referencias ("
+            " origen TEXT NOT NULL,"
+            " user_id TEXT NOT NULL,"
+            " PRIMARY KEY (origen, user_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_referencias_user ON referencias (user_id)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM perfiles").fetchone()[0]
+
+    def get_many(self, user_ids, include_expired=False):
+        """
+        Obtiene varios perfiles en bloque y actualiza su último acceso.
+
+        Args:
+            user_ids (list): IDs de usuario
+            include_expired (bool): Si es True, devuelve también perfiles con el TTL vencido
+
+        Returns:
+            dict: user_id → perfil (dict). Los IDs que no están en la caché no aparecen.
+        """
+        now = time.time()
+        min_updated = 0 if include_expired else now - self.ttl_seconds
+        unique_ids = list(dict.fromkeys(str(u) for u in user_ids))
+        profiles = {}
+
+        with self._lock:
+            for start in range(0, len(unique_ids), _BATCH_SIZE):
+                batch = unique_ids[start:start + _BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT user_id, perfil FROM perfiles WHERE user_id IN ({placeholders}) AND actualizado >= ?",
+                    (*batch, min_updated)
+                ).fetchall()
+                profiles.update((user_id, json.loads(perfil)) for user_id, perfil in rows)
+
+            self._conn.executemany("UPDATE perfiles SET ultimo_acceso = ? WHERE user_id = ?",
+                                   [(now, user_id) for user_id in profiles])
+            self._conn.commit()
+
+        return profiles
+
+    def put_many(self, profiles, reference=None):
+        """
+        Guarda perfiles en la caché. Los que ya están frescos no se vuelven a escribir.
+
+        Args:
+            profiles (list): Perfiles tal como los devuelve la API (con campo 'id')
+            reference (str, optional): Ruta del JSON que guardará solo los IDs de estos perfiles.
+                                       Sus perfiles no se desalojan mientras la referencia exista;
+                                       si ya había referencias con esa ruta, se reemplazan.
+
+        Returns:
+            int: Cantidad de perfiles nuevos o actualizados
+        """
+        now = time.time()
+        by_id = {str(p['id']): p for p in profiles if p.get('id') is not None}
+        fresh = set()
+
+        with self._lock:
+            ids = list(by_id)
+            for start in range(0, len(ids), _BATCH_SIZE):
+                batch = ids[start:start + _BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                fresh.update(row[0] for row in self._conn.execute(
+                    f"SELECT user_id FROM perfiles WHERE user_id IN ({placeholders}) AND actualizado >= ?",
+                    (*batch, now - self.ttl_seconds)
+                ))
+
+            rows = [(user_id, json.dumps(p, ensure_ascii=False), now, now)
+                    for user_id, p in by_id.items() if user_id not in fresh]
+            self._conn.executemany(
+                "INSERT INTO perfiles (user_id, perfil, actualizado, ultimo_acceso) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET perfil = excluded.perfil, "
+                "actualizado = excluded.actualizado, ultimo_acceso = excluded.ultimo_acceso",
+                rows
+            )
+            self._conn.executemany("UPDATE perfiles SET ultimo_acceso = ? WHERE user_id = ?",
+                                   [(now, user_id) for user_id in fresh])
+
+            if reference is not None:
+                origin = os.path.abspath(reference)
+                self._conn.execute("DELETE FROM referencias WHERE origen = ?", (origin,))
+                self._conn.executemany("INSERT INTO referencias (origen, user_id) VALUES (?, ?)",
+                                       [(origin, user_id) for user_id in by_id])
+            self._conn.commit()
+
+            self._evict()
+
+        return len(rows)
+
+    def release(self, reference):
+        """
+        Libera las referencias de un JSON (por ejemplo, antes de borrarlo).
+
+        Returns:
+            int: Cantidad de referencias eliminadas
+        """
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM referencias WHERE origen = ?",
+                                         (os.path.abspath(reference),)).rowcount
+            self._conn.commit()
+        return deleted
+
+    def prune_references(self):
+        """
+        Libera las referencias de los JSON que ya no existen en disco.
+
+        Returns:
+            int: Cantidad de JSON cuyas referencias se liberaron
+        """
+        with self._lock:
+            origins = [row[0] for row in self._conn.execute("SELECT DISTINCT origen FROM referencias")]
+            missing = [(origin,) for origin in origins if not os.path.exists(origin)]
+            self._conn.executemany("DELETE FROM referencias WHERE origen = ?", missing)
+            self._conn.commit()
+
+        if missing:
+            print(f"🧹 Caché de perfiles: referencias liberadas de {len(missing)} JSON que ya no existen")
+        return len(missing)
+
+    def _evict(self):
+        """
+        Borra los perfiles usados hace más tiempo si se supera max_profiles.
+
+        Solo se borran perfiles que ningún JSON referencia; los empates en el último acceso
+        se resuelven por user_id para que el resultado sea determinista.
+        """
+        excess = self._conn.execute("SELECT COUNT(*) FROM perfiles").fetchone()[0] - self.max_profiles
+        if excess <= 0:
+            return
+
+        deleted = self._conn.execute(
+            "DELETE FROM perfiles WHERE user_id IN "
+            "(SELECT user_id FROM perfiles"
+            " WHERE NOT EXISTS (SELECT 1 FROM referencias WHERE referencias.user_id = perfiles.user_id)"
+            " ORDER BY ultimo_acceso ASC, user_id ASC LIMIT ?)",
+            (excess,)
+        ).rowcount
+        self._conn.commit()
+
+        if deleted:
+            print(f"🧹 Caché de perfiles: {deleted} perfiles desalojados (LRU)")
+        if deleted < excess:
+            print(f"⚠️  Caché de perfiles: {excess - deleted} perfiles sobre el límite siguen referenciados "
+                  f"por JSON guardados; usar release() o prune_references() al borrar esos JSON")
@@ -0,0 +1,207 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+# Variable de entorno que activa el perfilado sin cambiar código:
+#   PERFILAR=1 (o "todo")   -> memoria y CPU
+#   PERFILAR=memoria        -> snapshots de tracemalloc entre etapas
+#   PERFILAR=cpu            -> cProfile en las etapas marcadas como cpu=True
+# Con cualquier valor se reportan tiempos por etapa y el pico de RSS.
+ENV_VAR = 'PERFILAR'
+
+# Líneas con más asignaciones que se reportan por etapa
+TOP_ALLOCATIONS = 10
+
+# Funciones que se muestran en el resumen de cada perfil de CPU
+TOP_FUNCTIONS = 25
+
+def _take_snapshot():
+    """Snapshot de tracemalloc sin las asignaciones del propio tracemalloc."""
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+def _enabled_modes():
+    value = os.environ.get(ENV_VAR, '').strip().lower()
+    if not value or value in ('0', 'no', 'false'):
+        return set()
+    if value in ('1', 'si', 'true', 'todo', 'all'):
+        return {'memoria', 'cpu'}
+    return {mode.strip() for mode in value.split(',') if mode.strip()}
+
+def _peak_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB y macOS bytes
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+class ProfilingSession:
+    """
+    Perfilado opcional por etapas para los convertidores y la puntuación.
+
+    Las etapas se delimitan con mark(): cada llamada cierra la etapa anterior y abre una
+    nueva. Una etapa que se repite (ej. un bloque de puntuación) acumula sus mediciones.
+    finish() cierra la última etapa y escribe los reportes junto al archivo de salida:
+    {salida}.perfil.txt y, si hay perfil de CPU, {salida}.{etapa}.prof (abrible con pstats
+    o snakeviz).
+
+    close() detiene las mediciones sin escribir reportes; conviene llamarla en un finally
+    (o usar la sesión como context manager) para que tracemalloc no siga activo si el proceso
+    sale antes de finish(). Ambas se pueden llamar más de una vez.
+
+    Si la variable de entorno PERFILAR no está definida, todos los métodos retornan de
+    inmediato y no hay costo medible.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.modes = _enabled_modes()
+        self.enabled = bool(self.modes)
+        self._stages = {}
+        self._current = None
+        self._started_tracemalloc = False
+        self._report_path = None
+
+        if self.enabled and 'memoria' in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Cierra la etapa en curso y detiene tracemalloc si esta sesión lo inició."""
+        if not self.enabled:
+            return
+        self._close_current()
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def mark(self, stage, cpu=False):
+        """
+        Cierra la etapa en curso y empieza otra.
+
+        Args:
+            stage (str): Nombre de la etapa
+            cpu (bool): Perfilar la etapa con cProfile (si PERFILAR incluye cpu)
+        """
+        if not self.enabled:
+            return
+        self._close_current()
+
+        stats = self._stages.setdefault(stage, {
+            'llamadas': 0, 'segundos': 0.0, 'mem_neta': 0, 'mem_pico': 0,
+            'top': [], 'top_neto': None, 'profiler': None
+        })
+        current = {'nombre': stage, 'inicio': time.perf_counter(), 'snapshot': None, 'profiler': None}
+
+        if 'memoria' in self.modes:
+            tracemalloc.reset_peak()
+            current['mem_inicio'] = tracemalloc.get_traced_memory()[0]
+            current['snapshot'] = _take_snapshot()
+
+        if cpu and 'cpu' in self.modes:
+            if stats['profiler'] is None:
+                stats['profiler'] = cProfile.Profile()
+            current['profiler'] = stats['profiler']
+            current['profiler'].enable()
+
+        self._current = current
+
+    def _close_current(self):
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+
+        if current['profiler'] is not None:
+            current['profiler'].disable()
+
+        stats = self._stages[current['nombre']]
+        stats['llamadas'] += 1
+        stats['segundos'] += time.perf_counter() - current['inicio']
+
+        if current['snapshot'] is not None:
+            now, peak = tracemalloc.get_traced_memory()
+            net = now - current['mem_inicio']
+            stats['mem_neta'] += net
+            stats['mem_pico'] = max(stats['mem_pico'], peak - current['mem_inicio'])
+
+            # Se conserva el detalle de la repetición con mayor crecimiento neto
+            if stats['top_neto'] is None or net > stats['top_neto']:
+                diff = _take_snapshot().compare_to(current['snapshot'], 'lineno')
+                stats['top'] = diff[:TOP_ALLOCATIONS]
+                stats['top_neto'] = net
+
+        stats['rss_pico_mb'] = _peak_rss_mb()
+
+    def finish(self, output_path):
+        """
+        Cierra la etapa en curso y escribe los reportes junto a output_path.
+
+        Args:
+            output_path (str): Archivo (o directorio) de salida del proceso perfilado
+
+        Returns:
+            str: Ruta del reporte de texto (la del primer llamado si se llama de nuevo),
+                 o None si el perfilado está desactivado
+        """
+        if not self.enabled or self._report_path is not None:
+            return self._report_path
+        self._close_current()
+
+        base = output_path.rstrip('/\\')
+        report_path = f'{base}.perfil.txt'
+        lines = [
+            f"Perfil: {self.name} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+            f"Modos: {', '.join(sorted(self.modes))}",
+            f"Pico de RSS del proceso: {_format_mb(_peak_rss_mb())}",
+            "",
+            f"{'etapa':<24}{'llamadas':>9}{'segundos':>11}{'mem_neta_MB':>13}{'mem_pico_MB':>13}{'rss_pico_MB':>13}"
+        ]
+        for stage, stats in self._stages.items():
+            lines.append(
+                f"{stage:<24}{stats['llamadas']:>9}{stats['segundos']:>11.2f}"
+                f"{stats['mem_neta'] / 1024**2:>13.2f}{stats['mem_pico'] / 1024**2:>13.2f}"
+                f"{_format_mb(stats.get('rss_pico_mb')):>13}"
+            )
+
+        for stage, stats in self._stages.items():
+            if stats['top']:
+                lines += ["", f"Asignaciones con mayor crecimiento en '{stage}' (tracemalloc):"]
+                lines += [f"  {stat}" for stat in stats['top']]
+
+        for stage, stats in self._stages.items():
+            if stats['profiler'] is not None:
+                prof_path = f'{base}.{stage}.prof'
+                stats['profiler'].dump_stats(prof_path)
+
+                buffer = io.StringIO()
+                pstats.Stats(stats['profiler'], stream=buffer).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+                lines += ["", f"CPU en '{stage}' (perfil completo en {prof_path}):", buffer.getvalue()]
+
+        with open(report_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+        self.close()
+        self._report_path = report_path
+        print(f"🔬 Reporte de perfilado: {report_path}")
+        return report_path
+
+def _format_mb(value):
+    return 'n/d' if value is None else f'{value:.1f}'
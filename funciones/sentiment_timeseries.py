@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+from funciones.convertir_json import CSV_DATE_FORMAT, add_parsed_date_columns
+
+# Mismas etiquetas que producen score_texts / score_replies_csv en text_analysis
+SENTIMENT_LABELS = ['NEG', 'NEU', 'POS']
+
+# Columnas aditivas que se acumulan por (conversación, intervalo)
+SUM_COLUMNS = (['n']
+               + [f'n_{label}' for label in SENTIMENT_LABELS]
+               + [f'suma_prob_{label}' for label in SENTIMENT_LABELS]
+               + ['n_odio', 'suma_prob_hateful', 'peso', 'suma_polaridad_ponderada'])
+
+def bucket_sums(df, freq='1h', group_column='tweet_original_id'):
+    """
+    Acumula las respuestas puntuadas en sumas por conversación e intervalo de tiempo.
+
+    Todas las columnas del resultado son sumas, así que dos resultados se pueden
+    combinar sumándolos y las tasas se derivan al final con rates_from_sums.
+
+    Args:
+        df (pd.DataFrame): Respuestas puntuadas (salida de score_replies_csv). Puede venir de
+                           load_converted_csv o de un pd.read_csv simple: las fechas en texto
+                           se parsean aquí.
+        freq (str): Tamaño del intervalo, ej. '15min', '1h', '1D'
+        group_column (str, optional): Columna que identifica la conversación. Si es None,
+                                      todas las respuestas se acumulan en un solo grupo.
+
+    Returns:
+        pd.DataFrame: Índice (grupo, intervalo) y las columnas de SUM_COLUMNS
+    """
+    if 'fecha_creacion_utc' not in df.columns:
+        df = add_parsed_date_columns(df.copy(), 'fecha_creacion')
+    elif not pd.api.types.is_datetime64_any_dtype(df['fecha_creacion_utc']):
+        df = df.assign(fecha_creacion_utc=pd.to_datetime(df['fecha_creacion_utc'], format=CSV_DATE_FORMAT,
+                                                         utc=True, errors='coerce'))
+
+    probas = {label: df[f'prob_{label}'].astype('float64') for label in SENTIMENT_LABELS}
+
+    # Cada respuesta pesa 1 + su engagement, para no ignorar las que no tienen interacción
+    weights = df['engagement_total'].astype('float64').fillna(0) + 1
+
+    sums = pd.DataFrame({
+        'grupo': df[group_column].astype(str) if group_column else 'todas',
+        'intervalo': df['fecha_creacion_utc'].dt.floor(freq),
+        'n': 1,
+        **{f'n_{label}': (df['sentimiento'] == label).astype('int64') for label in SENTIMENT_LABELS},
+        **{f'suma_prob_{label}': probas[label] for label in SENTIMENT_LABELS},
+        'n_odio': df['es_odio'].astype('boolean').fillna(False).astype('int64'),
+        'suma_prob_hateful': df['prob_hateful'].astype('float64'),
+        'peso': weights,
+        'suma_polaridad_ponderada': weights * (probas['POS'] - probas['NEG'])
+    }, index=df.index)
+
+    return sums.dropna(subset=['intervalo']).groupby(['grupo', 'intervalo']).sum()
+
+def rates_from_sums(sums):
+    """
+    Convierte sumas acumuladas en proporciones, promedios y sentimiento ponderado.
+
+    Args:
+        sums (pd.DataFrame): Salida de bucket_sums (o de un rolling sobre ella)
+
+    Returns:
+        pd.DataFrame: respuestas, proporcion_*, media_prob_*, tasa_odio, media_prob_hateful
+                      y sentimiento_ponderado (entre -1 y 1, ponderado por engagement)
+    """
+    n = sums['n'].where(sums['n'] > 0)
+    rates = pd.DataFrame({'respuestas': sums['n'].astype('int64')}, index=sums.index)
+
+    for label in SENTIMENT_LABELS:
+        rates[f'proporcion_{label}'] = sums[f'n_{label}'] / n
+    for label in SENTIMENT_LABELS:
+        rates[f'media_prob_{label}'] = sums[f'suma_prob_{label}'] / n
+
+    rates['tasa_odio'] = sums['n_odio'] / n
+    rates['media_prob_hateful'] = sums['suma_prob_hateful'] / n
+    rates['sentimiento_ponderado'] = sums['suma_polaridad_ponderada'] / sums['peso'].where(sums['peso'] > 0)
+
+    return rates
+
+def _fill_gaps(sums, freq):
+    """Agrega los intervalos sin respuestas (con sumas en cero) dentro del rango de cada grupo."""
+    parts = {}
+    for group, group_sums in sums.groupby(level='grupo'):
+        group_sums = group_sums.droplevel('grupo')
+        full_range = pd.date_range(group_sums.index.min(), group_sums.index.max(), freq=freq, name='intervalo')
+        parts[group] = group_sums.reindex(full_range, fill_value=0)
+
+    if not parts:
+        return sums
+    return pd.concat(parts, names=['grupo'])
+
+def _rolling_sums(sums, window):
+    """Suma móvil por grupo con una ventana de tiempo (ej. '24h')."""
+    rolled = (sums.reset_index(level='intervalo')
+              .groupby(level='grupo', group_keys=False)
+              .apply(lambda g: g.rolling(window, on='intervalo')[SUM_COLUMNS].sum()
+                     .assign(intervalo=g['intervalo'])))
+    return rolled.set_index('intervalo', append=True)
+
+class SentimentTimeSeries:
+    """
+    Serie de tiempo de sentimiento y discurso de odio por conversación, actualizable por partes.
+
+    Guarda solo las sumas por intervalo y los IDs de respuestas ya procesadas, así que cada
+    actualización procesa únicamente las respuestas nuevas y el historial no se recalcula.
+
+    Uso:
+        serie = SentimentTimeSeries.load('serie.pkl') o SentimentTimeSeries(freq='1h')
+        serie.update(respuestas_puntuadas_nuevas)
+        serie.resampled()          # un registro por intervalo
+        serie.rolling('24h')       # ventana móvil de 24 horas
+        serie.save('serie.pkl')
+    """
+
+    def __init__(self, freq='1h', group_column='tweet_original_id', id_column='reply_id'):
+        self.freq = freq
+        self.group_column = group_column
+        self.id_column = id_column
+        self.sums = pd.DataFrame(columns=SUM_COLUMNS,
+                                 index=pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([], tz='UTC')],
+                                                                 names=['grupo', 'intervalo']))
+        self.seen_ids = np.array([], dtype=np.int64)
+
+    def update(self, df):
+        """
+        Incorpora respuestas puntuadas; las que ya se habían procesado se ignoran.
+
+        Args:
+            df (pd.DataFrame): Respuestas puntuadas (pueden incluir respuestas ya vistas)
+
+        Returns:
+            int: Cantidad de respuestas nuevas incorporadas
+        """
+        ids = pd.to_numeric(df[self.id_column], errors='coerce').astype('Int64')
+        ids_array = ids.fillna(-1).to_numpy(dtype=np.int64)
+
+        is_new = ~np.isin(ids_array, self.seen_ids) & ids.notna().to_numpy()
+        is_new &= ~pd.Series(ids_array).duplicated().to_numpy()
+
+        new_rows = df[is_new]
+        if new_rows.empty:
+            print("🔁 Sin respuestas nuevas para la serie de tiempo")
+            return 0
+
+        new_sums = bucket_sums(new_rows, freq=self.freq, group_column=self.group_column)
+        self.sums = self.sums.add(new_sums, fill_value=0).sort_index() if len(self.sums) else new_sums
+        self.seen_ids = np.union1d(self.seen_ids, ids_array[is_new])
+
+        print(f"📈 Serie de tiempo actualizada: {len(new_rows)} respuestas nuevas "
+              f"({len(self.seen_ids)} en total)")
+        return len(new_rows)
+
+    def resampled(self, fill_gaps=True):
+        """
+        Tasas por intervalo de tamaño freq.
+
+        Args:
+            fill_gaps (bool): Incluir los intervalos sin respuestas (con tasas vacías)
+
+        Returns:
+            pd.DataFrame: Índice (grupo, intervalo) con las columnas de rates_from_sums
+        """
+        sums = _fill_gaps(self.sums, self.freq) if fill_gaps else self.sums
+        return rates_from_sums(sums)
+
+    def rolling(self, window='24h'):
+        """
+        Tasas sobre una ventana móvil de tiempo que termina en cada intervalo.
+
+        Args:
+            window (str): Duración de la ventana, ej. '6h', '24h', '7D'
+
+        Returns:
+            pd.DataFrame: Índice (grupo, intervalo) con las columnas de rates_from_sums
+        """
+        return rates_from_sums(_rolling_sums(_fill_gaps(self.sums, self.freq), window))
+
+    def save(self, path):
+        """Guarda el estado (sumas e IDs procesados) en un archivo pickle."""
+        pd.to_pickle({
+            'freq': self.freq,
+            'group_column': self.group_column,
+            'id_column': self.id_column,
+            'sums': self.sums,
+            'seen_ids': self.seen_ids
+        }, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Carga un estado guardado con save."""
+        state = pd.read_pickle(path)
+        series = cls(freq=state['freq'], group_column=state['group_column'], id_column=state['id_column'])
+        series.sums = state['sums']
+        series.seen_ids = state['seen_ids']
+        return series
@@ -1,5 +1,10 @@
+import json
+import os
+from functools import lru_cache
 from pysentimiento import create_analyzer
 import pandas as pd
+from funciones.convertir_json import concat_converted, load_converted_csv
+from funciones.profiling import ProfilingSession
 
 def analyze_sentiment(text, lenguage='es'):
     """
@@ -37,13 +42,145 @@ def create_replies_dataframe_fixed(archivos_replies):
     """
     Versión corregida que funciona correctamente.
     """
-    base = pd.DataFrame()  
+    frames = []
+    total = 0
     
     for archivo in archivos_replies:  
         print(f"📄 {archivo}")
-        df = pd.read_csv(archivo)
+        df = load_converted_csv(archivo)
         
-        base = pd.concat([base, df], ignore_index=True)
-        print(f"   Total: {len(base)} respuestas")
+        frames.append(df)
+        total += len(df)
+        print(f"   Total: {total} respuestas")
     
-    return base
\ No newline at end of file
+    # Se concatena una sola vez al final, unificando las categorías de todos los archivos
+    return concat_converted(frames)
+
+# Etiquetas de los modelos de pysentimiento en español
+SENTIMENT_LABELS = ['NEG', 'NEU', 'POS']
+HATE_LABELS = ['hateful', 'targeted', 'aggressive']
+
+@lru_cache(maxsize=None)
+def _get_analyzer(task):
+    """Carga cada modelo una sola vez por proceso."""
+    return create_analyzer(task=task, lang="es")
+
+def score_texts(texts, batch_size=64):
+    """
+    Calcula sentimiento y discurso de odio para una lista de textos.
+    
+    Args:
+        texts (iterable): Textos a analizar (los vacíos se analizan como '')
+        batch_size (int): Cantidad de textos por llamada a predict
+        
+    Returns:
+        pd.DataFrame: Una fila por texto con sentimiento, probabilidades y etiquetas de odio
+    """
+    sentiment_analyzer = _get_analyzer("sentiment")
+    hate_analyzer = _get_analyzer("hate_speech")
+    
+    texts = ['' if pd.isna(t) else str(t) for t in texts]
+    rows = []
+    
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        sentiments = sentiment_analyzer.predict(batch)
+        hates = hate_analyzer.predict(batch)
+        
+        for sentiment, hate in zip(sentiments, hates):
+            row = {'sentimiento': sentiment.output}
+            row.update({f'prob_{label}': sentiment.probas.get(label) for label in SENTIMENT_LABELS})
+            row['odio'] = ', '.join(hate.output)
+            row.update({f'prob_{label}': hate.probas.get(label) for label in HATE_LABELS})
+            row['es_odio'] = 'hateful' in hate.output
+            rows.append(row)
+    
+    return pd.DataFrame(rows)
+
+def score_replies_csv(csv_path, output_path, text_column='texto', batch_size=64, chunk_size=1000, resume=True):
+    """
+    Agrega las columnas de sentimiento y discurso de odio a un CSV de respuestas convertido.
+    
+    El CSV se lee por bloques y cada bloque puntuado se agrega al archivo de salida, así que
+    la memoria no crece con el tamaño del archivo. Después de cada bloque se registra el avance
+    en {output_path}.progreso.json; si el proceso se interrumpe, la siguiente llamada continúa
+    desde el último bloque completo. Al terminar, el archivo de avance se elimina.
+    
+    Args:
+        csv_path (str): CSV generado por replies_to_csv
+        output_path (str): Ruta del CSV puntuado
+        text_column (str): Columna con el texto a analizar
+        batch_size (int): Cantidad de textos por llamada a predict
+        chunk_size (int): Filas por bloque leído del CSV
+        resume (bool): Continuar un avance previo si existe. Si es False, se empieza de cero.
+        
+    Returns:
+        str: Ruta del CSV puntuado
+    """
+    print(f"🧠 Puntuando respuestas: {csv_path}")
+    
+    perf = ProfilingSession('score_replies_csv')
+    try:
+        progress_path = f'{output_path}.progreso.json'
+        source = {'entrada': os.path.abspath(csv_path),
+                  'tamano_entrada': os.path.getsize(csv_path),
+                  'modificacion_entrada': os.path.getmtime(csv_path)}
+        
+        done_rows = 0
+        progress = None
+        if resume and os.path.exists(progress_path) and os.path.exists(output_path):
+            with open(progress_path, 'r', encoding='utf-8') as file:
+                progress = json.load(file)
+            if all(progress.get(k) == v for k, v in source.items()):
+                done_rows = progress['filas_completadas']
+                # Descartar un bloque que se alcanzó a escribir pero no a registrar
+                with open(output_path, 'r+b') as file:
+                    file.truncate(progress['bytes_salida'])
+                print(f"🔄 Continuando desde la fila {done_rows}")
+            else:
+                print("⚠️  El CSV de entrada cambió desde el último avance - se empieza de cero")
+                progress = None
+        
+        if progress is None and os.path.exists(output_path):
+            os.remove(output_path)
+        
+        # Las filas ya puntuadas se saltan en el lector, sin parsearlas. Con una función
+        # (y no un range) pandas no arma un set con todos los índices a saltar.
+        skiprows = (lambda i: 0 < i <= done_rows) if done_rows else None
+        rows_read = done_rows
+        perf.mark('leer_bloque')
+        for chunk in load_converted_csv(csv_path, chunksize=chunk_size, skiprows=skiprows):
+            rows_read += len(chunk)
+            
+            perf.mark('predict', cpu=True)
+            scores = score_texts(chunk[text_column], batch_size=batch_size)
+            scores.index = chunk.index
+            chunk = pd.concat([chunk, scores], axis=1)
+            
+            perf.mark('escribir')
+            with open(output_path, 'a', encoding='utf-8', newline='') as file:
+                chunk.to_csv(file, index=False, header=file.tell() == 0)
+                file.flush()
+                os.fsync(file.fileno())
+                output_bytes = file.tell()
+            
+            done_rows = rows_read
+            _write_progress(progress_path, {**source, 'filas_completadas': done_rows, 'bytes_salida': output_bytes})
+            print(f"⏳ {done_rows} respuestas puntuadas...")
+            perf.mark('leer_bloque')
+        
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+        
+        print(f"✅ CSV puntuado: {output_path} ({done_rows} respuestas)")
+        perf.finish(output_path)
+        return output_path
+    finally:
+        perf.close()
+
+def _write_progress(progress_path, progress):
+    """Escribe el avance de forma atómica para que nunca quede a medio escribir."""
+    tmp_path = f'{progress_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(progress, file)
+    os.replace(tmp_path, progress_path)
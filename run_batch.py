@@ -0,0 +1,298 @@
+"""
+Ejecuta lotes de descarga, conversión y puntuación a partir de un manifiesto JSON.
+
+Uso:
+    python run_batch.py manifiesto.json [--etapas descargar,convertir,puntuar] [--trabajadores 4] [--forzar]
+
+Ejemplo de manifiesto:
+    {
+        "directorio_salida": "datos",
+        "max_concurrencia": 50,
+        "max_edad_horas": 24,
+        "cache_perfiles": "datos/perfiles_cache.sqlite",
+        "tweets": [
+            {"id": "1931500641194479719", "since_time": 1748736000, "until_time": 1749945599, "retweeters": true}
+        ],
+        "busquedas": [
+            {"nombre": "paz", "consultas": ["#paz", "paz total"], "limite_por_consulta": 500}
+        ]
+    }
+
+Cada trabajo escribe en rutas fijas dentro de directorio_salida (raw/, csv/, puntuados/),
+así que una etapa se omite si su salida ya existe y es más nueva que su entrada. Las
+descargas de una ventana cerrada (until_time en el pasado) no se repiten; las ventanas
+abiertas se vuelven a descargar cuando el JSON tiene más de max_edad_horas.
+
+Cada trabajo avanza por sus etapas apenas termina la anterior: la conversión de un trabajo
+empieza en cuanto termina su descarga, sin esperar a las demás. Las descargas comparten un
+solo event loop, las conversiones corren en un pool de procesos y la puntuación corre en el
+proceso principal (un trabajo a la vez) para cargar los modelos una sola vez.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from funciones import convertir_json
+from funciones.async_fetch import AsyncFetchEngine
+from funciones.profile_cache import ProfileCache
+
+STAGES = ['descargar', 'convertir', 'puntuar']
+
+def load_manifest(manifest_path):
+    """
+    Carga un manifiesto y completa los valores por defecto.
+
+    Args:
+        manifest_path (str): Ruta del manifiesto JSON
+
+    Returns:
+        dict: Manifiesto con todas las claves
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+
+    manifest.setdefault('directorio_salida', 'datos')
+    manifest.setdefault('max_concurrencia', 50)
+    manifest.setdefault('max_edad_horas', 24)
+    manifest.setdefault('cache_perfiles', None)
+    manifest.setdefault('tweets', [])
+    manifest.setdefault('busquedas', [])
+
+    return manifest
+
+def plan_jobs(manifest):
+    """
+    Traduce el manifiesto a una lista de trabajos con rutas de salida fijas.
+
+    Returns:
+        list: Un dict por trabajo con tipo, nombre, parámetros y rutas raw/csv/puntuado
+    """
+    base = manifest['directorio_salida']
+    jobs = []
+
+    def add(kind, name, params, until_time=None, score=True):
+        jobs.append({
+            'tipo': kind,
+            'nombre': name,
+            'params': params,
+            'until_time': until_time,
+            'raw': os.path.join(base, 'raw', f'{name}.json'),
+            'csv': os.path.join(base, 'csv', f'{name}.csv'),
+            'puntuado': os.path.join(base, 'puntuados', f'{name}.csv') if score else None
+        })
+
+    for tweet in manifest['tweets']:
+        tweet_id = str(tweet['id'])
+        since_time = tweet.get('since_time')
+        until_time = tweet.get('until_time')
+        window = f"{since_time or 'inicio'}_{until_time or 'fin'}"
+
+        add('respuestas', f'replies_{tweet_id}_{window}', {
+            'tweet_id': tweet_id,
+            'limit_responses': tweet.get('limite'),
+            'since_time': since_time,
+            'until_time': until_time
+        }, until_time=until_time)
+
+        if tweet.get('retweeters'):
+            add('retweeters', f'retweeters_{tweet_id}', {
+                'tweet_id': tweet_id,
+                'limit_responses': tweet.get('limite_retweeters')
+            }, score=False)
+
+    for i, search in enumerate(manifest['busquedas'], 1):
+        add('busqueda', f"search_{search.get('nombre', i)}", {
+            'search_queries': search['consultas'],
+            'limit_per_query': search.get('limite_por_consulta')
+        })
+
+    return jobs
+
+def is_up_to_date(output_path, input_path):
+    """Una salida está al día si existe y es más nueva que su entrada."""
+    if not os.path.exists(output_path):
+        return False
+    return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+def raw_is_up_to_date(job, max_age_hours):
+    """
+    Un JSON crudo está al día si cubre una ventana ya cerrada o si es reciente.
+
+    En job['raw'] solo se escriben descargas completas: si la paginación se corta por un
+    error, el motor guarda el resultado en {raw}.parcial.json y el trabajo sigue pendiente.
+    """
+    if not os.path.exists(job['raw']):
+        return False
+    fetched_at = os.path.getmtime(job['raw'])
+    if job['until_time'] and fetched_at > job['until_time']:
+        return True
+    return time.time() - fetched_at < max_age_hours * 3600
+
+def needs_fetch(job, manifest, force=False):
+    """Un trabajo se descarga si se fuerza o si su JSON crudo no está al día."""
+    return force or not raw_is_up_to_date(job, manifest['max_edad_horas'])
+
+def needs_convert(job, force=False):
+    """Un trabajo se convierte si hay JSON crudo y su CSV no está al día."""
+    return os.path.exists(job['raw']) and (force or not is_up_to_date(job['csv'], job['raw']))
+
+def needs_score(job, force=False):
+    """Un trabajo se puntúa si tiene ruta de puntuación y el resultado no está al día."""
+    # Un archivo de avance pendiente indica una puntuación interrumpida que hay que continuar
+    return bool(job['puntuado']) and os.path.exists(job['csv']) and (
+        force or not is_up_to_date(job['puntuado'], job['csv'])
+        or os.path.exists(f"{job['puntuado']}.progreso.json"))
+
+async def run_pipeline(jobs, manifest, stages, workers=None, force=False):
+    """
+    Lleva cada trabajo por las etapas pedidas de forma independiente.
+
+    La conversión de un trabajo se envía al pool de procesos apenas termina su descarga y
+    su puntuación empieza apenas termina su conversión, sin esperar a los demás trabajos.
+
+    Args:
+        jobs (list): Trabajos de plan_jobs
+        manifest (dict): Manifiesto de load_manifest
+        stages (list): Etapas a ejecutar, en el orden de STAGES
+        workers (int, optional): Procesos para la conversión
+        force (bool): Rehacer el trabajo aunque las salidas estén al día
+
+    Returns:
+        dict: Por etapa, segundos acumulados de sus trabajos, ejecutados y omitidos
+    """
+    stats = {stage: {'segundos': 0.0, 'ejecutados': 0, 'omitidos': 0} for stage in stages}
+    base = manifest['directorio_salida']
+    for folder in ('raw', 'csv', 'puntuados'):
+        os.makedirs(os.path.join(base, folder), exist_ok=True)
+
+    converters = {
+        'respuestas': convertir_json.replies_to_csv,
+        'retweeters': convertir_json.retweets_to_csv,
+        'busqueda': convertir_json.tweets_to_csv
+    }
+    loop = asyncio.get_running_loop()
+    score_lock = asyncio.Lock()
+    engine = cache = executor = None
+
+    async def timed(stage, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            stats[stage]['segundos'] += time.perf_counter() - start
+            stats[stage]['ejecutados'] += 1
+
+    def fetch(job):
+        if job['tipo'] == 'respuestas':
+            return engine.tweet_responses(**job['params'], output_path=job['raw'])
+        if job['tipo'] == 'retweeters':
+            return engine.tweet_retweets(**job['params'], profile_cache=cache, output_path=job['raw'])
+        return engine.search_many(**job['params'], output_path=job['raw'])
+
+    def convert(job):
+        kwargs = {'output_path': job['csv']}
+        if job['tipo'] == 'retweeters' and manifest['cache_perfiles']:
+            kwargs['profile_cache'] = manifest['cache_perfiles']
+        return loop.run_in_executor(executor, partial(converters[job['tipo']], job['raw'], **kwargs))
+
+    async def score(job):
+        # Import tardío: cargar pysentimiento solo si hay algo que puntuar
+        from funciones import text_analysis
+        async with score_lock:
+            return await asyncio.to_thread(text_analysis.score_replies_csv, job['csv'], job['puntuado'],
+                                           resume=not force)
+
+    async def process(job):
+        if 'descargar' in stages:
+            if needs_fetch(job, manifest, force):
+                try:
+                    result = await timed('descargar', fetch(job))
+                except Exception as e:
+                    print(f"❌ Falló la descarga de {job['nombre']}: {e}")
+                    return
+                if result is None:
+                    print(f"❌ La descarga de {job['nombre']} no obtuvo datos")
+                    return
+                if not result.get('completo', True):
+                    # Si había una descarga completa anterior, las etapas siguientes siguen con ella
+                    print(f"⚠️  Descarga incompleta de {job['nombre']}: se reintentará en la próxima ejecución")
+            else:
+                stats['descargar']['omitidos'] += 1
+
+        if 'convertir' in stages:
+            if needs_convert(job, force):
+                if await timed('convertir', convert(job)) is None:
+                    print(f"❌ Falló la conversión de {job['nombre']}")
+                    return
+            else:
+                stats['convertir']['omitidos'] += 1
+
+        if 'puntuar' in stages:
+            if needs_score(job, force):
+                await timed('puntuar', score(job))
+            else:
+                stats['puntuar']['omitidos'] += 1
+
+    async with contextlib.AsyncExitStack() as stack:
+        if 'descargar' in stages:
+            engine = await stack.enter_async_context(AsyncFetchEngine(max_concurrency=manifest['max_concurrencia']))
+            if manifest['cache_perfiles']:
+                cache = stack.enter_context(ProfileCache(manifest['cache_perfiles']))
+        if 'convertir' in stages:
+            # spawn: los procesos no heredan los hilos ni los locks del event loop en curso
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')))
+
+        results = await asyncio.gather(*[process(job) for job in jobs], return_exceptions=True)
+
+    # Un trabajo que falla no detiene a los demás
+    for job, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            print(f"❌ Falló el trabajo {job['nombre']}: {result}")
+
+    return stats
+
+def print_timing_summary(stats, wall_seconds):
+    """Imprime el tiempo acumulado y la cantidad de trabajos de cada etapa."""
+    print("\n" + "=" * 50)
+    print("⏱️  RESUMEN POR ETAPA (las etapas se solapan entre trabajos):")
+    print(f"{'etapa':<12}{'segundos':>10}{'ejecutados':>12}{'omitidos':>10}")
+    for stage, stage_stats in stats.items():
+        print(f"{stage:<12}{stage_stats['segundos']:>10.1f}{stage_stats['ejecutados']:>12}{stage_stats['omitidos']:>10}")
+    print(f"{'total':<12}{wall_seconds:>10.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta un lote de descarga, conversión y puntuación.")
+    parser.add_argument('manifiesto', help="Ruta del manifiesto JSON")
+    parser.add_argument('--etapas', default=','.join(STAGES),
+                        help=f"Etapas a ejecutar, separadas por coma (por defecto: {','.join(STAGES)})")
+    parser.add_argument('--trabajadores', type=int, default=None,
+                        help="Procesos para la conversión (por defecto: núcleos disponibles)")
+    parser.add_argument('--forzar', action='store_true',
+                        help="Rehacer el trabajo aunque las salidas estén al día")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.etapas.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+    stages = [stage for stage in STAGES if stage in stages]
+
+    manifest = load_manifest(args.manifiesto)
+    jobs = plan_jobs(manifest)
+    print(f"📋 {len(jobs)} trabajos en el manifiesto {args.manifiesto}")
+    print(f"🚀 Etapas: {', '.join(stages)}")
+
+    start = time.perf_counter()
+    stats = asyncio.run(run_pipeline(jobs, manifest, stages, workers=args.trabajadores, force=args.forzar))
+    print_timing_summary(stats, time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()